@@ -2,9 +2,10 @@ from fastapi import Depends, HTTPException, status
 import datetime # Keep this import
 from datetime import timedelta, datetime, timezone 
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from ..crud import user as crud_user
+from ..utils.user_cache import user_cache, CachedUser
 from jose import JWTError, jwt
 from ..schemas.user import TokenData
 from ..core.config import settings
@@ -14,7 +15,7 @@ from ..core.config import settings
 # then this should be tokenUrl="/auth/login" or adjust it as needed.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login") # <--- Potentially update this to /auth/login
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -28,6 +29,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         if user_id_str is None:
             raise credentials_exception
         user_id: int = int(user_id_str)
+        token_version: int = int(payload.get("ver") or 0)
         token_data = TokenData(user_id=user_id)
 
     except JWTError as e:
@@ -35,12 +37,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except ValueError as e:
         raise credentials_exception
 
-    user = crud_user.get_user_by_id(db, user_id=token_data.user_id)
-    if user is None:
+    cached = user_cache.get(token_data.user_id, token_version)
+    if cached is not None:
+        return cached
+
+    user = await crud_user.get_user_by_id_async(db, user_id=token_data.user_id)
+    # A token from before the user's last token_version bump is revoked
+    if user is None or (user.token_version or 0) != token_version:
         raise credentials_exception
 
-    print(f"--- DEBUG: User validated successfully: {user.email}")
-    return user
+    cached = CachedUser.from_model(user)
+    user_cache.put(cached)
+    return cached
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
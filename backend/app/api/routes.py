@@ -2,58 +2,73 @@
 
 import os
 import uuid
+import json
+import logging
 from datetime import timedelta
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ..database import get_db, get_async_db, SessionLocal, AsyncSessionLocal
 from ..crud import document as crud_doc
 from ..crud import summary as crud_sum
 from ..crud import citation as crud_cit
 from ..crud import user as crud_user
-from ..schemas.document import DocumentCreate, DocumentRead, DocumentStatusResponse
+from ..schemas.document import DocumentCreate, DocumentRead, DocumentStatusResponse, DocumentListItem, DocumentFull
 from ..schemas.summary import SummaryRead
 from ..schemas.citation import CitationRead
 from ..api.dependencies import get_current_user
 from ..models.document import DocumentStatus
 from ..core.config import settings
+from ..core.events import get_progress_bus, progress_event, TERMINAL_STATUSES
 from ..schemas.user import UserRead, UserCreate, Token, UserLogin
 from app.api.dependencies import create_access_token
 from ..tasks.process_document import process_document
-from ..utils.summarizer import generate_eli5_summary
-from ..utils.pdf_parser import extract_text_from_pdf
-from ..utils import research_paper_recommender
+from ..utils.summarizer import generate_eli5_summary, stream_eli5_summary
+from ..utils.text_cache import get_document_text
+from ..utils.uploads import save_upload, UploadRejected
+from ..utils.passwords import password_hasher
+from ..utils.research_paper_recommender import recommendation_service, RecommendationError
+from ..tasks.recommendations import recommendation_text
+from ..oauth_utils import ZoteroExporter
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 auth_router = APIRouter(prefix="/auth",tags=["auth"])
 
 UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
+# Listings are paged; a client that passes no limit gets the first DEFAULT_PAGE_SIZE rows
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
 
 #authroutes
 @auth_router.post("/signup",response_model=UserRead,status_code=status.HTTP_201_CREATED)
-def signup(user_in:UserCreate,db: Session = Depends(get_db)):
-    db_user = crud_user.get_user_by_email(db,email = user_in.email)
+async def signup(user_in:UserCreate,db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud_user.get_user_by_email_async(db,email = user_in.email)
     if db_user:
         raise HTTPException(status_code=400,detail="User already exists")
-    user = crud_user.create_user(db,user_in)
+    hashed_password = await password_hasher.hash(user_in.password)
+    user = await crud_user.create_user_async(db,user_in,hashed_password=hashed_password)
     return user
 
 @auth_router.post("/login",response_model=Token,status_code=status.HTTP_200_OK)
-async def login_for_access_token(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = crud_user.get_user_by_email(db,email = user_credentials.email)
-    if not user or not crud_user.verify_password(user_credentials.password, user.hashed_password):
+async def login_for_access_token(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await crud_user.get_user_by_email_async(db,email = user_credentials.email)
+    if not user or not await password_hasher.verify(user_credentials.password, user.hashed_password):
         raise HTTPException(status_code=400,detail="Incorrect email or password")
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+        data={"sub": str(user.id), "ver": user.token_version or 0}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 #documentroutes
-@router.post("/", response_model=DocumentRead, status_code=status.HTTP_201_CREATED)
-async def upload_document(
+@router.post("/", response_model=DocumentRead, status_code=status.HTTP_202_ACCEPTED)
+def upload_document(
     file: UploadFile = File(None),
     doc_in: DocumentCreate = Depends(),
     db: Session = Depends(get_db),
@@ -63,6 +78,11 @@ async def upload_document(
     Either accept a file upload, or a JSON body with source_url.
     If file is provided, save it and ignore source_url. If URL is provided instead,
     download it to local upload folder.
+
+    Processing is queued on the Celery worker pool; the PENDING document is returned
+    immediately and clients follow its progress via GET /documents/{id}.
+    A plain def, so the file copy, the sync session and (in eager mode) the
+    whole pipeline run on the threadpool rather than the event loop.
     """
     if file is None and not doc_in.source_url:
         raise HTTPException(status_code=400, detail="Must provide file or source_url.")
@@ -76,91 +96,193 @@ async def upload_document(
         file_ext = os.path.splitext(file.filename)[1]
         unique_name = f"{uuid.uuid4()}{file_ext}"
         dest_path = os.path.join(user_folder, unique_name)
-        with open(dest_path, "wb") as buffer:
-            buffer.write(await file.read())
-        doc = crud_doc.create_document(db, owner_id=current_user.id, file_path=dest_path, original_filename=file.filename)
+        try:
+            stored = save_upload(file, dest_path)
+        except UploadRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        file_hash = stored.sha256
+        doc = crud_doc.create_document(db, owner_id=current_user.id, file_path=dest_path, original_filename=file.filename, file_hash=file_hash)
+
+        # Same bytes already processed (by anyone): copy the results instead of re-running the pipeline
+        source = crud_doc.get_completed_document_by_hash(db, file_hash)
+        if source and crud_doc.clone_document_results(db, source.id, doc.id):
+            db.refresh(doc)
+            return doc
     else:
         # Download from URL (arXiv/DOI). For simplicity, we just store the URL and let Celery download it.
         doc = crud_doc.create_document(db, owner_id=current_user.id, file_path="", original_filename="", source_url=doc_in.source_url)
 
     try:
-        print(f"--- DEBUG: Document created with ID: {doc.id}, File Path: {doc.file_path} ---") # Added print
-        print(f"--- DEBUG: Attempting to call process_document for doc ID: {doc.id} ---") # Added print
-        db.refresh(doc)
-        process_document(None, doc.id) # Pass None for 'self' since it's not a Celery task
-        print(f"--- DEBUG: process_document call finished for doc ID: {doc.id} ---") # Added print
-        return doc
-    except Exception as e:
-        print(f"--- DEBUG: Exception caught in upload_document for doc ID {doc.id}: {e} ---") # Added print
-        import traceback
-        traceback.print_exc() # Print full traceback to console
-        raise HTTPException(status_code=500, detail="Error processing document.")
+        process_document.delay(doc.id)
+    except Exception:
+        logger.exception(f"Could not enqueue process_document for Document {doc.id}")
+        crud_doc.update_document_status(db, doc.id, DocumentStatus.FAILED)
+        raise HTTPException(status_code=503, detail="Could not queue document for processing.")
 
+    # In eager mode the job has already run on another session; pick up its writes
+    db.refresh(doc)
+    return doc
 
 
+
+@router.get("/dashboard", response_model=List[DocumentListItem])
+async def get_dashboard_documents(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status_filter: Optional[List[DocumentStatus]] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Same listing and paging as GET /documents/, with created_at and a snippet of
+    each document's summary, so the dashboard needs no per-document requests.
+    """
+    try:
+        rows, next_cursor = await crud_doc.list_documents_with_snippets_async(
+            db, owner_id=current_user.id, limit=limit, cursor=cursor, statuses=status_filter
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    documents = []
+    for row in rows:
+        item = dict(row._mapping)
+        item["summary_snippet"] = " ".join((item["summary_snippet"] or "").split()) or None
+        documents.append(item)
+    return documents
+
 @router.get("/{document_id}", response_model=DocumentRead)
-def get_document(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    print(f"DEBUG: Getting document {document_id} for user {current_user.id}")
-    db_doc = crud_doc.get_document(db, document_id)
-    print(f"DEBUG: Document found: {db_doc is not None}")
-    if db_doc:
-        print(f"DEBUG: Document owner: {db_doc.owner_id}, Current user: {current_user.id}")
+async def get_document(document_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    db_doc = await crud_doc.get_document_async(db, document_id)
+    if not db_doc or db_doc.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Document not found.")
+    return db_doc
+
+def _sse(data: dict, event: str = "progress") -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _read_progress_snapshot(document_id: int) -> dict | None:
+    # None once the document has been deleted
+    async with AsyncSessionLocal() as db:
+        db_doc = await crud_doc.get_document_async(db, document_id)
+        if db_doc is None:
+            return None
+        return progress_event(document_id, db_doc.status, db_doc.progress or 0)
+
+async def _progress_event_stream(document_id: int):
+    # Subscribe before reading the snapshot so nothing published in between is lost
+    subscription = await get_progress_bus().subscribe(document_id)
+    try:
+        snapshot = await _read_progress_snapshot(document_id)
+        if snapshot is None:
+            yield _sse({"document_id": document_id}, event="gone")
+            return
+        yield _sse(snapshot)
+        if snapshot["status"] in TERMINAL_STATUSES:
+            return
+        while True:
+            event = await subscription.get(timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+            if event is None:
+                # Nothing published for a while: check the row in case the
+                # terminal event was missed (or the document was deleted)
+                snapshot = await _read_progress_snapshot(document_id)
+                if snapshot is None:
+                    yield _sse({"document_id": document_id}, event="gone")
+                    return
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    yield _sse(snapshot)
+                    return
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": heartbeat\n\n"
+                continue
+            yield _sse(event)
+            if event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        await subscription.close()
+
+@router.get("/{document_id}/events")
+async def stream_document_events(document_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """
+    Server-Sent Events stream of processing progress: the current state first,
+    then every update until the document is COMPLETED or FAILED. A "gone"
+    event ends the stream if the document is deleted meanwhile.
+    """
+    db_doc = await crud_doc.get_document_async(db, document_id)
+    if not db_doc or db_doc.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Document not found.")
+    return StreamingResponse(
+        _progress_event_stream(document_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{document_id}/full", response_model=DocumentFull)
+async def get_document_full(document_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    """
+    Document, summary and citations in one response (what the summary page
+    otherwise fetches with three requests).
+    """
+    db_doc = await crud_doc.get_document_full_async(db, document_id)
     if not db_doc or db_doc.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Document not found.")
     return db_doc
 
 @router.get("/{document_id}/summary", response_model=SummaryRead)
-def fetch_summary(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    db_doc = crud_doc.get_document(db, document_id)
+async def fetch_summary(document_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    db_doc = await crud_doc.get_document_async(db, document_id)
     if not db_doc or db_doc.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Document not found.")
     if db_doc.status != DocumentStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Document is not yet processed.")
-    db_summary = crud_sum.get_summary_by_document(db, document_id)
+    db_summary = await crud_sum.get_summary_by_document_async(db, document_id)
     if not db_summary:
         raise HTTPException(status_code=404, detail="Summary not found.")
     return db_summary
 
 @router.get("/{document_id}/citations", response_model=List[CitationRead])
-def fetch_citations(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    db_doc = crud_doc.get_document(db, document_id)
+async def fetch_citations(document_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    db_doc = await crud_doc.get_document_async(db, document_id)
     if not db_doc or db_doc.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Document not found.")
     if db_doc.status != DocumentStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Document is not yet processed.")
-    citations = crud_cit.get_citations_by_document(db, document_id)
+    citations = await crud_cit.get_citations_by_document_async(db, document_id)
     return citations
 
 @router.get("/{document_id}/recommendations")
 def recommend_research_papers(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """
     Recommend research papers based on the document's summary (or full text if summary not available).
+    Normally computed when processing completes and read from the document row;
+    if none are stored yet they are looked up now (through the cached
+    recommendation service) and stored.
     """
     db_doc = crud_doc.get_document(db, document_id)
     if not db_doc or db_doc.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Document not found.")
     if db_doc.status != DocumentStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Document is not yet processed.")
-    db_summary = crud_sum.get_summary_by_document(db, document_id)
-    if db_summary:
-        text = " ".join([
-            db_summary.introduction or "",
-            db_summary.methods or "",
-            db_summary.results or "",
-            db_summary.conclusion or "",
-        ])
-    else:
-        from ..utils.pdf_parser import extract_text_from_pdf
-        text = extract_text_from_pdf(db_doc.file_path)
+    if db_doc.recommendations is not None:
+        return {"recommendations": db_doc.recommendations}
+    text = recommendation_text(db, db_doc)
     if not text.strip():
         raise HTTPException(status_code=400, detail="No text available for recommendations.")
-    papers = research_paper_recommender.recommend_papers(text)
+    try:
+        papers = recommendation_service.recommend(text)
+    except RecommendationError:
+        logger.exception(f"Recommendation lookup failed for Document {document_id}")
+        return {"recommendations": []}
+    crud_doc.set_document_recommendations(db, document_id, papers)
     return {"recommendations": papers}
 
 @router.post("/{document_id}/eli5", response_model=SummaryRead)
-def generate_eli5_summary_endpoint(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def generate_eli5_summary_endpoint(document_id: int, fresh: bool = False, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """
     Generate an ELI5 (Explain Like I'm 5) summary for a document.
+    Pass fresh=true to get a new explanation instead of the cached one.
     """
     db_doc = crud_doc.get_document(db, document_id)
     if not db_doc or db_doc.owner_id != current_user.id:
@@ -174,11 +296,11 @@ def generate_eli5_summary_endpoint(document_id: int, db: Session = Depends(get_d
         raise HTTPException(status_code=404, detail="Summary not found.")
     
     try:
-        # Extract text from PDF
-        full_text = extract_text_from_pdf(db_doc.file_path)
+        # Extracted text is cached by content hash, so this does not re-run OCR
+        full_text = get_document_text(db_doc.file_path, sha256=db_doc.file_hash)
         
         # Generate ELI5 summary
-        eli5_summary = generate_eli5_summary(full_text)
+        eli5_summary = generate_eli5_summary(full_text, use_cache=not fresh)
         
         # Update the summary with ELI5 content
         updated_summary = crud_sum.update_eli5_summary(db, document_id, eli5_summary)
@@ -188,10 +310,53 @@ def generate_eli5_summary_endpoint(document_id: int, db: Session = Depends(get_d
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating ELI5 summary: {str(e)}")
 
+def _save_eli5_summary(document_id: int, eli5_summary: str):
+    db = SessionLocal()
+    try:
+        crud_sum.update_eli5_summary(db, document_id, eli5_summary)
+    finally:
+        db.close()
+
+async def _eli5_event_stream(document_id: int, file_path: str, file_hash: str, fresh: bool):
+    try:
+        full_text = await run_in_threadpool(get_document_text, file_path, sha256=file_hash)
+        parts = []
+        async for piece in stream_eli5_summary(full_text, use_cache=not fresh):
+            parts.append(piece)
+            yield _sse({"text": piece}, event="token")
+        eli5_summary = "".join(parts).strip()
+        await run_in_threadpool(_save_eli5_summary, document_id, eli5_summary)
+    except Exception as e:
+        yield _sse({"detail": f"Error generating ELI5 summary: {str(e)}"}, event="error")
+        return
+    yield _sse({"eli5_summary": eli5_summary}, event="done")
+
+@router.get("/{document_id}/eli5/stream")
+def stream_eli5_summary_endpoint(document_id: int, fresh: bool = False, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """
+    Streaming variant of POST /{document_id}/eli5: Server-Sent Events with one
+    "token" event per piece of text as the model writes it, then "done" with
+    the full explanation once it has been saved (or "error").
+    """
+    db_doc = crud_doc.get_document(db, document_id)
+    if not db_doc or db_doc.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Document not found.")
+    if db_doc.status != DocumentStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Document is not yet processed.")
+    if not crud_sum.get_summary_by_document(db, document_id):
+        raise HTTPException(status_code=404, detail="Summary not found.")
+    return StreamingResponse(
+        _eli5_event_stream(document_id, db_doc.file_path, db_doc.file_hash, fresh),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/{document_id}/push_zotero")
 def push_to_zotero(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """
     Take all Citation rows for this document and push them to Zotero using the user's stored API key.
+    Items go out in batches of up to 50; the response counts created and
+    failed items and lists the outcome for each citation.
     In production, you may need to handle OAuth token refreshing, etc.
     """
     db_doc = crud_doc.get_document(db, document_id)
@@ -200,13 +365,14 @@ def push_to_zotero(document_id: int, db: Session = Depends(get_db), current_user
     if not current_user.zotero_api_key or not current_user.zotero_user_id:
         raise HTTPException(status_code=400, detail="Zotero credentials not configured.")
     citations = crud_cit.get_citations_by_document(db, document_id)
-    added_count = 0
-    from ..oauth_utils import push_citation_to_zotero
-    for cit in citations:
-        success = push_citation_to_zotero(current_user.zotero_user_id, current_user.zotero_api_key, cit.raw_bibtex)
-        if success:
-            added_count += 1
-    return {"success": True, "added_count": added_count}
+    exporter = ZoteroExporter(current_user.zotero_user_id, current_user.zotero_api_key)
+    result = exporter.export_citations(citations)
+    return {
+        "success": result.failed == 0,
+        "added_count": result.created,
+        "failed_count": result.failed,
+        "items": result.items,
+    }
 
 @router.delete("/{document_id}/summary", status_code=status.HTTP_204_NO_CONTENT)
 def delete_summary(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
@@ -244,8 +410,28 @@ def delete_document(document_id: int, db: Session = Depends(get_db), current_use
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("/", response_model=List[DocumentRead])
-def get_all_documents(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    documents = crud_doc.get_documents_by_owner(db, owner_id=current_user.id)
+async def get_all_documents(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status_filter: Optional[List[DocumentStatus]] = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    The user's documents, newest first, limit (default 20, at most 100) at a
+    time: the cursor for the next page comes back in the X-Next-Cursor header
+    (absent on the last page). status may be repeated to filter, e.g.
+    ?status=COMPLETED.
+    """
+    try:
+        documents, next_cursor = await crud_doc.list_documents_page_async(
+            db, owner_id=current_user.id, limit=limit, cursor=cursor, statuses=status_filter
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return documents
 
 
@@ -1 +1,15 @@
-from app.core.celery_app import celery_app
\ No newline at end of file
+# app/celery_worker.py
+# Entry point for the background worker pool:
+#   celery -A app.celery_worker worker --loglevel=info
+# Exactly one worker (or a separate `celery -A app.celery_worker beat`) also runs
+# the scheduler for the stale-document sweep:
+#   celery -A app.celery_worker worker -B --loglevel=info
+import os
+
+# Must be set before app.database is imported: worker processes size their
+# connection pools for one task at a time (DB_WORKER_POOL_SIZE)
+os.environ.setdefault("DB_ROLE", "worker")
+
+from app.core.celery_app import celery_app  # noqa: E402
+import app.tasks.process_document  # noqa: E402,F401  (registers tasks)
+import app.tasks.recommendations  # noqa: E402,F401
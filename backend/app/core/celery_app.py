@@ -1,22 +1,48 @@
+"""
+Configuration and Celery application for the Lit Summarizer backend.
+"""
 # app/core/celery_app.py
 
 from celery import Celery
 from .config import settings
 
+if settings.CELERY_TASK_ALWAYS_EAGER:
+    # Single-box mode: tasks run inline, nothing ever touches Redis
+    broker_url = "memory://"
+    result_backend = "cache+memory://"
+else:
+    broker_url = settings.CELERY_BROKER_URL
+    result_backend = settings.CELERY_RESULT_BACKEND
+
 celery_app = Celery(
     "lit_summarizer",
-    broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND,
+    broker=broker_url,
+    backend=result_backend,
+    include=["app.tasks.process_document", "app.tasks.recommendations"],
 )
 
-# Optionally, configure Celery from settings:
 celery_app.conf.update(
     task_track_started=True,
     result_expires=3600,
     accept_content=["json"],
     task_serializer="json",
     result_serializer="json",
+    # Document jobs are long and uneven: hand each worker process one job at a
+    # time and only ack once it is done, so a crashed worker's job is redelivered.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Redis redelivers unacked tasks after the visibility timeout (default 1 h),
+    # which would start a second copy of a job that is still running
+    broker_transport_options={"visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT},
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=False,
+    # Needs a beat scheduler: `celery beat` or one worker started with -B
+    beat_schedule={
+        "recover-stale-documents": {
+            "task": "app.tasks.recover_stale_documents",
+            "schedule": float(settings.DOCUMENT_RECOVERY_INTERVAL_SECONDS),
+        },
+    },
 )
-
-# Autodiscover tasks if they live under app/tasks
-celery_app.autodiscover_tasks(["app.tasks"])
@@ -11,17 +11,139 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL","")
+    # Used by the async engine; derived from DATABASE_URL (asyncpg / aiosqlite) when empty
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # Connection pools. DB_ROLE picks the size: "api" processes serve many
+    # concurrent requests, "worker" processes (set by app/celery_worker.py) run
+    # one task at a time per child. Each engine (sync and async) gets its own pool.
+    DB_ROLE: str = os.getenv("DB_ROLE", "api")
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_WORKER_POOL_SIZE: int = 2
+    DB_WORKER_MAX_OVERFLOW: int = 2
+    # Seconds to wait for a free connection before raising, and the age after
+    # which a connection is replaced (below typical server/proxy idle cutoffs)
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
     
     # Celery
-    #CELERY_BROKER_URL: str = "redis://localhost:6379/0"
-    #CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1"
+    CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+    CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
+    # Eager mode runs tasks in-process with an in-memory broker (no Redis needed)
+    CELERY_TASK_ALWAYS_EAGER: bool = False
+    CELERY_WORKER_CONCURRENCY: int = 4
+    # Seconds an unacked (late-ack) task may run before Redis hands it to another
+    # worker; keep it above the longest expected OCR + LLM job
+    CELERY_VISIBILITY_TIMEOUT: int = 6 * 3600
     
     SECRET_KEY: str = os.getenv("SECRET_KEY","eepyuppie")
+    # Authenticated users are cached per (user id, token version) for this long
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    # Threads for bcrypt hashing/verification (app/utils/passwords.py)
+    PASSWORD_HASH_WORKERS: int = 2
     ACCESS_TOKEN_EXPIRE_MINUTES: ClassVar[int] = 21600
     ALGORITHM: ClassVar[str] = "HS256"
     
+    # PDF extraction: documents with at least PDF_PARALLEL_MIN_PAGES pages are split
+    # across a shared process pool; OCR pages go to their own, smaller pool.
+    # PDF_EXTRACT_WORKERS=0 means cpu_count // CELERY_WORKER_CONCURRENCY, so the
+    # prefork children of one worker share the cores between them
+    PDF_EXTRACT_WORKERS: int = 0
+    PDF_OCR_WORKERS: int = 2
+    PDF_PARALLEL_MIN_PAGES: int = 16
+    # OCR: pages rendered per tesseract invocation, and the adaptive resolution
+    # tier ("fast", "balanced" or "accurate", see app/utils/ocr.py)
+    OCR_BATCH_SIZE: int = 16
+    OCR_MODE: str = "balanced"
+
+    # A PROCESSING document whose row has not been written for this long is
+    # treated as abandoned (its job died): it no longer blocks identical uploads
+    # and the recovery sweep fails it and re-queues a waiting identical upload.
+    # Rows are only written on stage changes, so this must exceed the longest
+    # single stage (OCR of a large scan, or all LLM calls of a long paper).
+    DOCUMENT_PROCESSING_LEASE_SECONDS: int = 3600
+    DOCUMENT_RECOVERY_INTERVAL_SECONDS: int = 600
+
+    # Uploads larger than this are refused (413) before they are read or as they are received
+    MAX_UPLOAD_MB: int = 200
+
+    # Extracted text cache, keyed by the SHA-256 of the PDF bytes and the OCR settings
+    TEXT_CACHE_DIR: str = os.getenv("TEXT_CACHE_DIR", os.path.join(os.getcwd(), "text_cache"))
+
+    # Job progress is pushed over the progress bus ("memory" for a single process,
+    # "redis" when workers run separately; empty picks memory only in eager mode);
+    # ticks are coalesced to at most one per step or interval, and the DB row is
+    # only written on stage changes
+    PROGRESS_BUS_BACKEND: str = os.getenv("PROGRESS_BUS_BACKEND", "")
+    PROGRESS_BUS_URL: str = os.getenv("PROGRESS_BUS_URL", "")
+    PROGRESS_MIN_STEP: int = 5
+    PROGRESS_MIN_INTERVAL_MS: int = 1000
+    PROGRESS_HEARTBEAT_SECONDS: float = 15.0
+
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+
+    # Shared LLM gateway (app/utils/llm_gateway.py). LLM_BASE_URL overrides the
+    # provider endpoint, e.g. to point at the local fake server (benchmarks/fake_llm.py).
+    LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "")
+    LLM_TIMEOUT: float = 60.0
+    LLM_MAX_CONCURRENCY: int = 8
+    # Provider account limits, shared by every process that calls the provider.
+    # The gateway's buckets live in one process, so each process enforces a
+    # slice (llm_gateway.process_rate_limits): API processes (LLM_API_PROCESSES,
+    # e.g. uvicorn --workers) split LLM_API_RATE_SHARE of the budget and worker
+    # children (LLM_WORKER_PROCESSES across all worker hosts, 0 means one
+    # worker's CELERY_WORKER_CONCURRENCY) split the rest. In eager mode the
+    # jobs run in the API processes, which then split the whole budget.
+    LLM_REQUESTS_PER_MINUTE: int = 30
+    LLM_TOKENS_PER_MINUTE: int = 30000
+    LLM_API_PROCESSES: int = 1
+    LLM_WORKER_PROCESSES: int = 0
+    LLM_API_RATE_SHARE: float = 0.2
+    LLM_MAX_RETRIES: int = 5
+    LLM_BACKOFF_BASE: float = 1.0
+    LLM_BACKOFF_MAX: float = 30.0
+    # Response cache in front of the gateway (memory LRU + SQLite file)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", os.path.join(os.getcwd(), "llm_cache.sqlite3"))
+    LLM_CACHE_MEMORY_ENTRIES: int = 512
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Summarization: "single" sends the whole paper in one prompt, "map_reduce"
+    # summarizes chunks concurrently first, "auto" picks map_reduce for long papers
+    SUMMARY_MODE: str = "auto"
+    SUMMARY_SINGLE_SHOT_MAX_CHARS: int = 48000
+    SUMMARY_CHUNK_CHARS: int = 12000
+    SUMMARY_MAX_CONCURRENCY: int = 4
+    SUMMARY_REDUCE_FAN_IN: int = 8
+
+    # Citation extraction: prompt-token and entry budget per batch of references,
+    # and how many batches are converted at once
+    CITATION_BATCH_TOKENS: int = 1500
+    CITATION_BATCH_MAX_ENTRIES: int = 20
+    CITATION_MAX_CONCURRENCY: int = 4
     
+    # Paper recommendations (app/utils/research_paper_recommender.py): Semantic
+    # Scholar search results are cached per keyword query, identical concurrent
+    # queries share one request, and at most RECOMMENDER_MAX_CONCURRENCY run at once
+    SEMANTIC_SCHOLAR_API_URL: str = os.getenv("SEMANTIC_SCHOLAR_API_URL", "https://api.semanticscholar.org/graph/v1/paper/search")
+    SEMANTIC_SCHOLAR_API_KEY: str = os.getenv("SEMANTIC_SCHOLAR_API_KEY", "")
+    RECOMMENDER_TIMEOUT: float = 10.0
+    RECOMMENDER_MAX_CONCURRENCY: int = 4
+    RECOMMENDER_CACHE_TTL_SECONDS: int = 6 * 3600
+    RECOMMENDER_CACHE_MAX_ENTRIES: int = 1024
+
+    # Zotero export (app/oauth_utils.py). ZOTERO_API_URL can point at a local
+    # fake server; writes go out in batches of up to 50 items (the API limit),
+    # a few batches at a time over one keep-alive session
+    ZOTERO_API_URL: str = os.getenv("ZOTERO_API_URL", "https://api.zotero.org")
+    ZOTERO_BATCH_SIZE: int = 50
+    ZOTERO_MAX_CONCURRENCY: int = 3
+    ZOTERO_TIMEOUT: float = 30.0
+    ZOTERO_MAX_RETRIES: int = 4
+    ZOTERO_BACKOFF_BASE: float = 1.0
+    ZOTERO_BACKOFF_MAX: float = 60.0
+
     # Zotero / Mendeley credentials (if using OAuth)
     #ZOTERO_API_KEY: str = os.getenv("ZOTERO_API_KEY", "")
     #ZOTERO_USER_ID: str = os.getenv("ZOTERO_USER_ID", "")
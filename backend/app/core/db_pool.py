@@ -0,0 +1,127 @@
+# app/core/db_pool.py
+"""
+Connection pool instrumentation. Each engine gets a PoolMetrics: a pool
+subclass times every checkout (the wait for a free connection, plus the
+connect when the pool opens a new one) and counts timeouts, while pool events
+track how many connections are in use. /metrics publishes the numbers.
+"""
+
+import time
+import threading
+from collections import deque
+from sqlalchemy import event, exc
+
+class PoolMetrics:
+    def __init__(self, name: str, samples: int = 1000):
+        self.name = name
+        self._lock = threading.Lock()
+        # Most recent checkout waits in seconds, for the percentiles
+        self._waits = deque(maxlen=samples)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._engine = None
+
+    def pool_class(self, base: type) -> type:
+        """
+        Subclass of `base` (QueuePool, AsyncAdaptedQueuePool) that reports its
+        checkout times here. Pool.recreate() builds self.__class__, so the
+        timing survives engine.dispose().
+        """
+        metrics = self
+
+        def _do_get(pool):
+            start = time.perf_counter()
+            try:
+                record = base._do_get(pool)
+            except exc.TimeoutError:
+                metrics._record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics._record_wait(time.perf_counter() - start)
+            return record
+
+        # Same module as the base, so pool logging stays under sqlalchemy.pool
+        return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get, "__module__": base.__module__})
+
+    def listen(self, engine):
+        """
+        Attach the pool events to a sync Engine (async_engine.sync_engine for
+        an AsyncEngine).
+        """
+        self._engine = engine
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "wait_ms": {
+                    "mean": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                    "p50": waits[len(waits) // 2] * 1000 if waits else 0.0,
+                    "p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+                    "max": self.wait_max * 1000,
+                },
+            }
+        # Live figures straight from a QueuePool (absent for SQLite's
+        # in-memory pools, which have no size or overflow)
+        if pool is not None and hasattr(pool, "overflow"):
+            stats["pool"] = {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            }
+        return stats
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+def register_pool_metrics(name: str) -> PoolMetrics:
+    metrics = pool_metrics[name] = PoolMetrics(name)
+    return metrics
+
+def pool_stats() -> dict:
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
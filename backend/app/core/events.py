@@ -0,0 +1,176 @@
+"""
+Progress event bus: pipeline stages publish {document_id, status, stage, progress}
+events and the SSE endpoint streams them to clients.
+
+The in-memory backend only reaches subscribers in the same process, so it is
+only usable in eager mode. With real Celery workers, which run in their own
+processes, the Redis backend is used (the default unless CELERY_TASK_ALWAYS_EAGER
+is set); asking for "memory" there is refused at startup.
+"""
+# app/core/events.py
+
+import json
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"COMPLETED", "FAILED"}
+
+def progress_event(document_id: int, status: str, progress: int, stage: str = None) -> dict:
+    return {"document_id": document_id, "status": str(getattr(status, "value", status)), "stage": stage, "progress": progress}
+
+class _MemorySubscription:
+    def __init__(self, bus, document_id: int):
+        self._bus = bus
+        self._document_id = document_id
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+    def _deliver(self, event: dict):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def get(self, timeout: float) -> dict | None:
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self._bus._unsubscribe(self._document_id, self)
+
+class InMemoryProgressBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._last = {}
+
+    def publish(self, event: dict):
+        document_id = event["document_id"]
+        with self._lock:
+            if event["status"] in TERMINAL_STATUSES:
+                # Late subscribers read the terminal state from the DB instead
+                self._last.pop(document_id, None)
+            else:
+                self._last[document_id] = event
+            subscribers = list(self._subscribers.get(document_id, ()))
+        for subscription in subscribers:
+            subscription._deliver(event)
+
+    async def subscribe(self, document_id: int) -> _MemorySubscription:
+        subscription = _MemorySubscription(self, document_id)
+        with self._lock:
+            self._subscribers[document_id].add(subscription)
+            last = self._last.get(document_id)
+        if last:
+            subscription._deliver(last)
+        return subscription
+
+    def _unsubscribe(self, document_id: int, subscription: _MemorySubscription):
+        with self._lock:
+            subscribers = self._subscribers.get(document_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[document_id]
+
+class _RedisSubscription:
+    def __init__(self, client, pubsub, pending: dict | None):
+        self._client = client
+        self._pubsub = pubsub
+        self._pending = pending
+
+    async def get(self, timeout: float) -> dict | None:
+        if self._pending:
+            event, self._pending = self._pending, None
+            return event
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message["data"])
+
+    async def close(self):
+        await self._pubsub.aclose()
+        await self._client.aclose()
+
+class RedisProgressBus:
+    """
+    Publishes on a per-document Redis channel and keeps the latest event in a
+    short-lived key so a subscriber that connects mid-job gets the current state.
+    """
+    LAST_EVENT_TTL = 3600
+
+    def __init__(self, url: str):
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _channel(document_id: int) -> str:
+        return f"progress:{document_id}"
+
+    def publish(self, event: dict):
+        payload = json.dumps(event)
+        channel = self._channel(event["document_id"])
+        pipe = self._client.pipeline()
+        pipe.set(f"{channel}:last", payload, ex=self.LAST_EVENT_TTL)
+        pipe.publish(channel, payload)
+        pipe.execute()
+
+    async def subscribe(self, document_id: int) -> _RedisSubscription:
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        channel = self._channel(document_id)
+        await pubsub.subscribe(channel)
+        last = await client.get(f"{channel}:last")
+        return _RedisSubscription(client, pubsub, json.loads(last) if last else None)
+
+_bus = None
+_bus_lock = threading.Lock()
+
+def progress_bus_backend() -> str:
+    """
+    The configured backend, or the default for the Celery mode. Raises
+    RuntimeError for "memory" with non-eager Celery: the worker would publish
+    into its own process and API-side streams would never see an update.
+    """
+    backend = settings.PROGRESS_BUS_BACKEND or ("memory" if settings.CELERY_TASK_ALWAYS_EAGER else "redis")
+    if backend not in ("memory", "redis"):
+        raise RuntimeError(f"Unknown PROGRESS_BUS_BACKEND {backend!r} (expected 'memory' or 'redis')")
+    if backend == "memory" and not settings.CELERY_TASK_ALWAYS_EAGER:
+        raise RuntimeError(
+            "PROGRESS_BUS_BACKEND=memory only works with CELERY_TASK_ALWAYS_EAGER=true; "
+            "use the redis backend when Celery workers run separately"
+        )
+    return backend
+
+def get_progress_bus():
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                if progress_bus_backend() == "redis":
+                    _bus = RedisProgressBus(settings.PROGRESS_BUS_URL or settings.CELERY_BROKER_URL)
+                else:
+                    _bus = InMemoryProgressBus()
+    return _bus
+
+def publish_progress(document_id: int, status: str, progress: int, stage: str = None) -> bool:
+    """
+    Best-effort: the DB row is the source of truth and the SSE endpoint falls
+    back to it, so a bus outage (e.g. Redis unreachable) is logged and must not
+    fail the job or interrupt its failure handling. Returns whether it was sent.
+    """
+    try:
+        get_progress_bus().publish(progress_event(document_id, status, progress, stage))
+        return True
+    except Exception as e:
+        logger.warning(f"Progress event for Document {document_id} ({status}) not published: {e!r}")
+        return False
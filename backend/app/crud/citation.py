@@ -1,4 +1,6 @@
 # app/crud/citation.py
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..models.citation import Citation
 
@@ -17,5 +19,20 @@ def create_citation(db: Session, document_id: int, raw_bibtex: str, apa_text: st
     db.refresh(db_cit)
     return db_cit
 
+def create_citations_bulk(db: Session, document_id: int, citations: list[dict]) -> int:
+    """
+    Insert many citations for one document in a single executemany statement and
+    a single commit. Each dict holds the Citation columns other than document_id.
+    """
+    if not citations:
+        return 0
+    db.execute(insert(Citation), [{**citation, "document_id": document_id} for citation in citations])
+    db.commit()
+    return len(citations)
+
 def get_citations_by_document(db: Session, document_id: int):
     return db.query(Citation).filter(Citation.document_id == document_id).all()
+
+async def get_citations_by_document_async(db: AsyncSession, document_id: int):
+    result = await db.execute(select(Citation).where(Citation.document_id == document_id))
+    return result.scalars().all()
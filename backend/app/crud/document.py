@@ -1,16 +1,23 @@
 # app/crud/document.py
-from sqlalchemy.orm import Session
+import json
+import base64
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, update, delete, select, tuple_, func, exists, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
 from ..models.document import DocumentStatus,Document
 from ..models.summary import Summary
 from ..models.citation import Citation
+from ..core.config import settings
 import os
 
-def create_document(db: Session, owner_id: int, file_path: str, original_filename: str = None, source_url: str = None):
+def create_document(db: Session, owner_id: int, file_path: str, original_filename: str = None, source_url: str = None, file_hash: str = None):
     db_doc = Document(
         owner_id=owner_id,
         file_path=file_path,
         original_filename=original_filename,
         source_url=source_url,
+        file_hash=file_hash,
         status=DocumentStatus.PENDING,
         progress=0,
     )
@@ -25,6 +32,285 @@ def get_document(db: Session, document_id: int):
 def get_documents_by_owner(db: Session, owner_id: int):
     return db.query(Document).filter(Document.owner_id == owner_id).all()
 
+# Columns of DocumentRead; listing pages load only these
+DOCUMENT_LIST_COLUMNS = (
+    Document.id,
+    Document.owner_id,
+    Document.original_filename,
+    Document.source_url,
+    Document.status,
+    Document.progress,
+    Document.created_at,
+)
+
+def encode_cursor(created_at: datetime, document_id: int) -> str:
+    payload = json.dumps([created_at.isoformat() if created_at else None, document_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Inverse of encode_cursor; raises ValueError on anything malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, document_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(document_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _filter_owner_page(query, owner_id: int, cursor: str = None, statuses: list[DocumentStatus] = None):
+    # Works on both a Query and a select(), so sync and async listings share it
+    query = query.filter(Document.owner_id == owner_id)
+    if statuses:
+        query = query.filter(Document.status.in_(statuses))
+    if cursor:
+        created_at, document_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Document.created_at, Document.id) < tuple_(created_at, document_id))
+    return query.order_by(Document.created_at.desc(), Document.id.desc())
+
+def _split_page(rows, limit: int = None):
+    # Rows were fetched with one extra row, which tells whether there is a next page
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+def _owner_page(query, owner_id: int, limit: int = None, cursor: str = None, statuses: list[DocumentStatus] = None):
+    query = _filter_owner_page(query, owner_id, cursor, statuses)
+    if limit is None:
+        return query.all(), None
+    return _split_page(query.limit(limit + 1).all(), limit)
+
+def list_documents_page(db: Session, owner_id: int, limit: int = None, cursor: str = None, statuses: list[DocumentStatus] = None):
+    """
+    One page of the owner's documents, newest first, as DOCUMENT_LIST_COLUMNS
+    rows. Keyset pagination on (created_at, id) walks ix_documents_owner_created
+    from the cursor, so deep pages cost the same as the first one. Returns
+    (rows, next_cursor); next_cursor is None on the last page. Without a limit
+    every matching row is returned.
+    """
+    return _owner_page(db.query(*DOCUMENT_LIST_COLUMNS), owner_id, limit, cursor, statuses)
+
+SUMMARY_SNIPPET_CHARS = 300
+
+def _summary_snippet_column():
+    sections = [func.coalesce(column, "") for column in (Summary.introduction, Summary.methods, Summary.results, Summary.conclusion)]
+    joined = sections[0]
+    for section in sections[1:]:
+        joined = joined + " " + section
+    return func.substr(joined, 1, SUMMARY_SNIPPET_CHARS).label("summary_snippet")
+
+def get_document_full(db: Session, document_id: int):
+    """
+    Document with its summary and citations loaded up front: the summary is
+    joined in, the citations come from one extra SELECT ... IN query.
+    """
+    return (
+        db.query(Document)
+        .options(joinedload(Document.summary), selectinload(Document.citations))
+        .filter(Document.id == document_id)
+        .first()
+    )
+
+# Async variants for the request path (AsyncSession from get_async_db)
+
+async def get_document_async(db: AsyncSession, document_id: int):
+    return await db.get(Document, document_id)
+
+async def _owner_page_async(statement, db: AsyncSession, owner_id: int, limit: int = None, cursor: str = None, statuses: list[DocumentStatus] = None):
+    statement = _filter_owner_page(statement, owner_id, cursor, statuses)
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+    rows = (await db.execute(statement)).all()
+    return _split_page(rows, limit)
+
+async def list_documents_page_async(db: AsyncSession, owner_id: int, limit: int = None, cursor: str = None, statuses: list[DocumentStatus] = None):
+    return await _owner_page_async(select(*DOCUMENT_LIST_COLUMNS), db, owner_id, limit, cursor, statuses)
+
+async def list_documents_with_snippets_async(db: AsyncSession, owner_id: int, limit: int = None, cursor: str = None, statuses: list[DocumentStatus] = None):
+    """
+    Dashboard variant of list_documents_page_async: each row also carries
+    summary_snippet, the start of the summary sections, fetched in the same
+    query through an outer join (truncated in SQL so full summaries are
+    never transferred).
+    """
+    statement = (
+        select(*DOCUMENT_LIST_COLUMNS, _summary_snippet_column())
+        .outerjoin(Summary, Summary.document_id == Document.id)
+    )
+    return await _owner_page_async(statement, db, owner_id, limit, cursor, statuses)
+
+async def get_document_full_async(db: AsyncSession, document_id: int):
+    result = await db.execute(
+        select(Document)
+        .options(joinedload(Document.summary), selectinload(Document.citations))
+        .where(Document.id == document_id)
+    )
+    return result.unique().scalar_one_or_none()
+
+def _has_summary_text(document_id_column):
+    # A Summary row with at least one non-empty section. Documents completed
+    # with a blank summary are never used as a source for identical uploads.
+    return exists().where(
+        Summary.document_id == document_id_column,
+        or_(*(func.length(func.coalesce(column, "")) > 0
+              for column in (Summary.introduction, Summary.methods, Summary.results, Summary.conclusion))),
+    )
+
+def get_completed_document_by_hash(db: Session, file_hash: str):
+    return (
+        db.query(Document)
+        .filter(Document.file_hash == file_hash, Document.status == DocumentStatus.COMPLETED, _has_summary_text(Document.id))
+        .order_by(Document.id)
+        .first()
+    )
+
+def get_pending_documents_by_hash(db: Session, file_hash: str, exclude_id: int):
+    return (
+        db.query(Document)
+        .filter(Document.file_hash == file_hash, Document.status == DocumentStatus.PENDING, Document.id != exclude_id)
+        .all()
+    )
+
+def _lock_file_hash(db: Session, file_hash: str):
+    # Transaction-scoped PostgreSQL advisory lock per file content, released by
+    # the commit. SQLite needs none: it runs one write transaction at a time.
+    if db.get_bind().dialect.name == "postgresql":
+        key = int.from_bytes(bytes.fromhex(file_hash[:16]), "big", signed=True)
+        db.execute(select(func.pg_advisory_xact_lock(key)))
+
+def processing_lease_cutoff() -> datetime:
+    # PROCESSING rows last written before this belong to a job that has died
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.DOCUMENT_PROCESSING_LEASE_SECONDS)
+
+def claim_document(db: Session, document_id: int, file_hash: str = None) -> bool:
+    """
+    Atomically move a document to PROCESSING. Fails if it has meanwhile been
+    completed (e.g. filled in from an identical upload) or marked FAILED, or -
+    when file_hash is given - if another document with the same content is
+    already PROCESSING and was written within DOCUMENT_PROCESSING_LEASE_SECONDS;
+    the caller then leaves this one PENDING for that job to fill in. Claims for
+    the same hash are serialized, so of two identical uploads only one can win.
+    PROCESSING is accepted so a redelivered job can pick its document up again.
+    """
+    conditions = [Document.id == document_id, Document.status.in_([DocumentStatus.PENDING, DocumentStatus.PROCESSING])]
+    if file_hash:
+        _lock_file_hash(db, file_hash)
+        other = aliased(Document)
+        conditions.append(~exists().where(
+            other.file_hash == file_hash, other.status == DocumentStatus.PROCESSING, other.id != document_id,
+            other.updated_at >= processing_lease_cutoff(),
+        ))
+    result = db.execute(update(Document).where(*conditions).values(status=DocumentStatus.PROCESSING, progress=10))
+    db.commit()
+    return result.rowcount == 1
+
+def get_stale_processing_documents(db: Session):
+    """
+    PROCESSING documents not written within the lease (or never written since
+    the column was added).
+    """
+    return (
+        db.query(Document)
+        .filter(Document.status == DocumentStatus.PROCESSING,
+                or_(Document.updated_at.is_(None), Document.updated_at < processing_lease_cutoff()))
+        .all()
+    )
+
+def fail_stale_document(db: Session, document_id: int) -> bool:
+    """
+    Mark a document FAILED if it is still PROCESSING and still past its lease;
+    False if its job wrote to it meanwhile (or it finished).
+    """
+    result = db.execute(
+        update(Document)
+        .where(Document.id == document_id, Document.status == DocumentStatus.PROCESSING,
+               or_(Document.updated_at.is_(None), Document.updated_at < processing_lease_cutoff()))
+        .values(status=DocumentStatus.FAILED)
+        # SQLite hands datetimes back naive, so in-session evaluation of the
+        # cutoff comparison would fail; the caller does not reuse the object
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def clone_document_results(db: Session, source_id: int, target_id: int) -> bool:
+    """
+    Copy the Summary and Citation rows (and stored recommendations) of a completed
+    document onto a PENDING document with the same file content and mark it
+    COMPLETED, in one transaction.
+    Returns False (and changes nothing) if the target is no longer PENDING or
+    the source has no summary text to copy.
+    """
+    if not db.query(_has_summary_text(source_id)).scalar():
+        return False
+    source_recommendations = db.query(Document.recommendations).filter(Document.id == source_id).scalar()
+    result = db.execute(
+        update(Document)
+        .where(Document.id == target_id, Document.status == DocumentStatus.PENDING)
+        .values(status=DocumentStatus.COMPLETED, progress=100, recommendations=source_recommendations)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        return False
+
+    summary = db.query(Summary).filter(Summary.document_id == source_id).first()
+    if summary:
+        db.add(Summary(
+            document_id=target_id,
+            introduction=summary.introduction,
+            methods=summary.methods,
+            results=summary.results,
+            conclusion=summary.conclusion,
+            eli5_summary=summary.eli5_summary,
+        ))
+    citations = db.query(Citation).filter(Citation.document_id == source_id).all()
+    if citations:
+        db.execute(insert(Citation), [
+            {
+                "document_id": target_id,
+                "raw_bibtex": cit.raw_bibtex,
+                "apa_text": cit.apa_text,
+                "doi": cit.doi,
+                "title": cit.title,
+                "authors": cit.authors,
+                "year": cit.year,
+            }
+            for cit in citations
+        ])
+    db.commit()
+    return True
+
+def save_document_results(db: Session, document_id: int, summary: dict, eli5_summary: str = None, citations: list[dict] = ()):
+    """
+    Write a document's Summary and Citation rows in one transaction. Safe to
+    repeat for a redelivered job: the summary is updated in place if an
+    earlier attempt already stored one, and the citations are replaced.
+    """
+    sections = {key: summary.get(key, "") for key in ("introduction", "methods", "results", "conclusion")}
+    db_summary = db.query(Summary).filter(Summary.document_id == document_id).first()
+    if db_summary is None:
+        db.add(Summary(document_id=document_id, eli5_summary=eli5_summary, **sections))
+    else:
+        for key, value in sections.items():
+            setattr(db_summary, key, value)
+        db_summary.eli5_summary = eli5_summary
+    db.execute(delete(Citation).where(Citation.document_id == document_id))
+    if citations:
+        db.execute(insert(Citation), [{**citation, "document_id": document_id} for citation in citations])
+    db.commit()
+
+def set_document_progress(db: Session, document_id: int, status: DocumentStatus, progress: int):
+    """
+    Single UPDATE statement for progress ticks (no SELECT or refresh round trips).
+    """
+    db.execute(update(Document).where(Document.id == document_id).values(status=status, progress=progress))
+    db.commit()
+
+def set_document_recommendations(db: Session, document_id: int, recommendations: list[dict]):
+    db.execute(update(Document).where(Document.id == document_id).values(recommendations=recommendations))
+    db.commit()
+
 def update_document_status(db: Session, document_id: int, status: DocumentStatus, progress: int = None):
     db_doc = get_document(db, document_id)
     if not db_doc:
@@ -1,4 +1,6 @@
 # app/crud/summary.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..models.summary import Summary
 
@@ -19,6 +21,10 @@ def create_summary(db: Session, document_id: int, introduction: str, methods: st
 def get_summary_by_document(db: Session, document_id: int):
     return db.query(Summary).filter(Summary.document_id == document_id).first()
 
+async def get_summary_by_document_async(db: AsyncSession, document_id: int):
+    result = await db.execute(select(Summary).where(Summary.document_id == document_id).limit(1))
+    return result.scalar_one_or_none()
+
 def update_eli5_summary(db: Session, document_id: int, eli5_summary: str):
     summary = db.query(Summary).filter(Summary.document_id == document_id).first()
     if summary:
@@ -1,4 +1,6 @@
 # app/crud/user.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..models.user import User
 from ..schemas.user import UserCreate
@@ -12,13 +14,27 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
-def create_user(db: Session, user_in: UserCreate):
-    hashed_pwd = pwd_context.hash(user_in.password)
+def create_user(db: Session, user_in: UserCreate, hashed_password: str = None):
+    hashed_pwd = hashed_password or pwd_context.hash(user_in.password)
     db_user = User(email=user_in.email, hashed_password=hashed_pwd, full_name=user_in.fullname)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email).limit(1))
+    return result.scalar_one_or_none()
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
+
+async def create_user_async(db: AsyncSession, user_in: UserCreate, hashed_password: str):
+    db_user = User(email=user_in.email, hashed_password=hashed_password, full_name=user_in.fullname)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -1,18 +1,87 @@
 # app/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from .core.config import settings
+from .core.db_pool import register_pool_metrics
+
+def pool_options(url, base_pool: type, metrics) -> dict:
+    """
+    Pool arguments for DB_ROLE ("api" or "worker"), with the pool class
+    instrumented by `metrics`. SQLite in-memory databases keep SQLAlchemy's
+    default single-connection pool.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    if settings.DB_ROLE == "worker":
+        size, overflow = settings.DB_WORKER_POOL_SIZE, settings.DB_WORKER_MAX_OVERFLOW
+    else:
+        size, overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    return {
+        "poolclass": metrics.pool_class(base_pool),
+        "pool_size": size,
+        "max_overflow": overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
 
 # Create engine and sessionmaker
+sync_pool_metrics = register_pool_metrics("sync")
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    **pool_options(settings.DATABASE_URL, QueuePool, sync_pool_metrics),
 )
+sync_pool_metrics.listen(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str):
+    """
+    The async driver equivalent of a sync DATABASE_URL: postgresql (any
+    driver) becomes postgresql+asyncpg and sqlite becomes sqlite+aiosqlite.
+    asyncpg takes ssl= instead of libpq's sslmode= and rejects the other
+    libpq-only query options, so those are translated or dropped.
+    """
+    parsed = make_url(url)
+    backend = parsed.drivername.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    if backend != "sqlite":
+        query = dict(parsed.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        query.pop("channel_binding", None)
+        parsed = parsed.set(query=query)
+    return parsed
+
+# Async engine for the request path: read-heavy routes await queries here
+# instead of holding a threadpool thread for each one
+ASYNC_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_pool_metrics = register_pool_metrics("async")
+async_engine = create_async_engine(
+    ASYNC_URL,
+    pool_pre_ping=True,
+    **pool_options(ASYNC_URL, AsyncAdaptedQueuePool, async_pool_metrics),
+)
+async_pool_metrics.listen(async_engine.sync_engine)
+
+# expire_on_commit=False: attributes stay readable after commit without an
+# implicit (and, under asyncio, impossible) lazy refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Dependency for FastAPI
 def get_db():
     db = SessionLocal()
@@ -20,3 +89,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,7 +1,19 @@
+import asyncio
+import logging
 import uvicorn
+from fastapi.concurrency import run_in_threadpool
 from fastapi import FastAPI
 from app.api.routes import router as document_router, auth_router
 from fastapi.middleware.cors import CORSMiddleware
+from app.utils.uploads import UploadSizeLimitMiddleware
+from app.utils.user_cache import user_cache
+from app.utils.llm_cache import llm_cache
+from app.utils.research_paper_recommender import recommendation_service
+from app.database import async_engine
+from app.core.config import settings
+from app.core.db_pool import pool_stats
+from app.core.events import get_progress_bus
+from app.tasks.process_document import recover_stale_documents
 # If you have an auth router (e.g. for /auth/token), import and include it here:
 # from app.api.auth import auth_router
 
@@ -18,14 +30,49 @@ app = FastAPI(
 app.include_router(document_router)
 app.include_router(auth_router)
 
+# Added before CORS so its 413 responses still carry the CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.on_event("startup")
+def check_progress_bus():
+    # Fail fast on a progress bus that cannot reach the workers
+    get_progress_bus()
+
+async def _recover_stale_documents_periodically():
+    while True:
+        try:
+            await run_in_threadpool(recover_stale_documents)
+        except Exception:
+            logging.getLogger(__name__).exception("Stale document sweep failed")
+        await asyncio.sleep(settings.DOCUMENT_RECOVERY_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+async def start_stale_document_sweep():
+    # In eager mode jobs run in the API process and there is no beat scheduler,
+    # so the sweep for jobs lost to a restart runs here
+    if settings.CELERY_TASK_ALWAYS_EAGER:
+        app.state.stale_document_sweep = asyncio.create_task(_recover_stale_documents_periodically())
+
+@app.on_event("shutdown")
+async def stop_stale_document_sweep():
+    sweep = getattr(app.state, "stale_document_sweep", None)
+    if sweep:
+        sweep.cancel()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    # Close pooled asyncpg/aiosqlite connections on this loop before it stops
+    await async_engine.dispose()
+
 # (Optional) If you create an auth router later:
 # app.include_router(auth_router, prefix="/auth", tags=["auth"])
 
@@ -36,6 +83,18 @@ async def root():
     """
     return {"message": "Literature Summarizer API is up and running."}
 
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """
+    In-process cache and connection pool statistics for this API worker.
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "recommendations": recommendation_service.stats(),
+        "db_pools": {"role": settings.DB_ROLE, **pool_stats()},
+    }
+
 if __name__ == "__main__":
     # Run with: python -m uvicorn app.main:app --reload
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
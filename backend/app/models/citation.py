@@ -6,7 +6,7 @@ from ..database import Base
 class Citation(Base):
     __tablename__ = "citations"
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     
     # You can store whichever fields you like:
     raw_bibtex = Column(Text, nullable=False)
@@ -1,8 +1,9 @@
 # app/models/document.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+from datetime import datetime, timezone
 from ..database import Base
 
 class DocumentStatus(str, enum.Enum):
@@ -18,12 +19,23 @@ class Document(Base):
     file_path = Column(String, nullable=False)
     original_filename = Column(String, nullable=True)
     source_url = Column(String, nullable=True)      # if user submitted arXiv/DOI link
+    file_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the uploaded bytes
     status = Column(Enum(DocumentStatus), default=DocumentStatus.PENDING)
     progress = Column(Integer, default=0)            # e.g. 0..100
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Related papers, stored by the compute_recommendations task; NULL until computed
+    recommendations = Column(JSON(none_as_null=True), nullable=True)
+    # Set client-side as well, so every row stores the same timestamp format:
+    # SQLite's CURRENT_TIMESTAMP has no fractional seconds, and keyset cursors
+    # compare created_at against a bound value that always has them
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     owner = relationship("User", back_populates="documents")
     summary = relationship("Summary", back_populates="document", uselist=False)
     citations = relationship("Citation", back_populates="document")
+
+    __table_args__ = (
+        # Serves the per-owner listing in (created_at, id) keyset order
+        Index("ix_documents_owner_created", "owner_id", "created_at", "id"),
+    )
@@ -10,6 +10,8 @@ class User(Base):
     hashed_password = Column(String, nullable=True)   # if using password auth
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    # Bumped to revoke every token issued so far; tokens carry it as "ver"
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # If you store Zotero credentials per user:
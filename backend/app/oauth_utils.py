@@ -1,26 +1,199 @@
 # app/oauth_utils.py
 
+import time
+import random
+import secrets
+import logging
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 import requests
+from requests.adapters import HTTPAdapter
+from .core.config import settings
 
-def push_citation_to_zotero(zotero_user_id: str, zotero_api_key: str, bibtex_str: str) -> bool:
+logger = logging.getLogger(__name__)
+
+# Zotero accepts at most this many items per write request
+ZOTERO_MAX_BATCH = 50
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_zotero_session() -> requests.Session:
+    """
+    Process-wide keep-alive session for the Zotero API, so exports reuse TLS
+    connections instead of opening one per item. Credentials are sent per
+    request; the session carries none.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Room for a few concurrent exports, each with its own batches in flight
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=settings.ZOTERO_MAX_CONCURRENCY * 4, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Zotero-API-Version": "3", "Content-Type": "application/json"})
+            _session = session
+        return _session
+
+def _seconds_header(value: str | None) -> float | None:
+    # Backoff is always seconds; Retry-After may also be an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def zotero_item(citation) -> dict:
+    """
+    Zotero journalArticle for a Citation row. Authors are stored BibTeX-style
+    ("Last, First and Other, Name"); the raw BibTeX goes into Extra when the
+    title could not be parsed, so the item is never blank.
+    """
+    creators = []
+    for author in (citation.authors or "").split(" and "):
+        author = author.strip()
+        if not author:
+            continue
+        if "," in author:
+            last, first = author.split(",", 1)
+            creators.append({"creatorType": "author", "lastName": last.strip(), "firstName": first.strip()})
+        else:
+            creators.append({"creatorType": "author", "name": author})
+    item = {"itemType": "journalArticle", "title": citation.title or "", "creators": creators}
+    if citation.year:
+        item["date"] = citation.year
+    if citation.doi:
+        item["DOI"] = citation.doi
+    if not citation.title:
+        item["extra"] = citation.raw_bibtex
+    return item
+
+@dataclass
+class ZoteroExportResult:
+    created: int = 0
+    failed: int = 0
+    # One entry per input item, in input order: {"index", "status", "key" | "error"}
+    items: list[dict] = field(default_factory=list)
+
+class ZoteroExporter:
     """
-    Push a single BibTeX string as a Zotero item via the Zotero API.
-    For simplicity, we create a “book” itemType. In reality, you'd parse fields
-    (title, author, year) and build a JSON payload accordingly.
+    Writes items to a user's Zotero library in batches of up to 50 (one POST
+    each), with ZOTERO_MAX_CONCURRENCY batches in flight over the shared
+    session. A Backoff header pauses every batch of this export for the given
+    seconds; 429/503 (with Retry-After) and other 5xx or connection errors are
+    retried. Each batch carries a Zotero-Write-Token, so a retried batch that
+    the server had in fact applied is answered with 412 instead of duplicated.
     """
-    # Endpoint: https://api.zotero.org/users/{user_id}/items
-    url = f"https://api.zotero.org/users/{zotero_user_id}/items"
-    headers = {
-        "Zotero-API-Key": zotero_api_key,
-        "Content-Type": "application/json"
-    }
-    # Minimal payload (you may need to adjust itemType, etc.)
-    data = [
-        {
-            "itemType": "journalArticle",
-            "bibtex": bibtex_str,
-            # Zotero can import from BibTeX string
-        }
-    ]
-    resp = requests.post(url, json=data, headers=headers)
-    return resp.status_code in (200, 201)
+    def __init__(self, user_id: str, api_key: str, session: requests.Session = None, base_url: str = None,
+                 batch_size: int = None, max_concurrency: int = None):
+        self.url = f"{(base_url or settings.ZOTERO_API_URL).rstrip('/')}/users/{user_id}/items"
+        self.api_key = api_key
+        self.session = session or get_zotero_session()
+        self.batch_size = min(batch_size or settings.ZOTERO_BATCH_SIZE, ZOTERO_MAX_BATCH)
+        self.max_concurrency = max_concurrency or settings.ZOTERO_MAX_CONCURRENCY
+        self._lock = threading.Lock()
+        self._not_before = 0.0
+
+    def _defer(self, seconds: float):
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + seconds)
+
+    def _wait_turn(self):
+        while True:
+            with self._lock:
+                delay = self._not_before - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(settings.ZOTERO_BACKOFF_MAX, settings.ZOTERO_BACKOFF_BASE * 2 ** attempt))
+
+    def _send_batch(self, items: list[dict]) -> list[dict]:
+        headers = {"Zotero-API-Key": self.api_key, "Zotero-Write-Token": secrets.token_hex(16)}
+        error = None
+        for attempt in range(settings.ZOTERO_MAX_RETRIES + 1):
+            if attempt:
+                logger.warning(f"Zotero batch failed ({error}); retry {attempt}/{settings.ZOTERO_MAX_RETRIES}")
+            self._wait_turn()
+            try:
+                resp = self.session.post(self.url, json=items, headers=headers, timeout=settings.ZOTERO_TIMEOUT)
+            except requests.RequestException as e:
+                error = str(e)
+                if attempt < settings.ZOTERO_MAX_RETRIES:
+                    time.sleep(self._backoff(attempt))
+                continue
+
+            backoff = _seconds_header(resp.headers.get("Backoff"))
+            if backoff:
+                self._defer(backoff)
+            if resp.status_code in (429, 503) or resp.status_code >= 500:
+                error = f"HTTP {resp.status_code}"
+                retry_after = _seconds_header(resp.headers.get("Retry-After"))
+                if retry_after is not None:
+                    # A rate limit applies to the whole key, so every batch waits
+                    self._defer(retry_after)
+                elif attempt < settings.ZOTERO_MAX_RETRIES:
+                    time.sleep(self._backoff(attempt))
+                continue
+            if resp.status_code == 412:
+                # Write token already used: an earlier attempt of this batch went through
+                return [{"status": "created", "key": None} for _ in items]
+            if resp.status_code != 200:
+                error = f"HTTP {resp.status_code}: {resp.text[:200]}"
+                return [{"status": "failed", "error": error} for _ in items]
+            return self._item_results(resp.json(), len(items))
+
+        return [{"status": "failed", "error": error} for _ in items]
+
+    @staticmethod
+    def _item_results(body: dict, count: int) -> list[dict]:
+        # Zotero reports per-item outcomes keyed by the item's index in the batch
+        successful = body.get("successful") or {}
+        unchanged = body.get("unchanged") or {}
+        failed = body.get("failed") or {}
+        results = []
+        for i in range(count):
+            key = str(i)
+            if key in successful:
+                results.append({"status": "created", "key": successful[key].get("key")})
+            elif key in unchanged:
+                results.append({"status": "created", "key": unchanged[key]})
+            elif key in failed:
+                results.append({"status": "failed", "error": failed[key].get("message") or f"code {failed[key].get('code')}"})
+            else:
+                results.append({"status": "failed", "error": "missing from Zotero response"})
+        return results
+
+    def export(self, items: list[dict]) -> ZoteroExportResult:
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        result = ZoteroExportResult()
+        if not batches:
+            return result
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches)), thread_name_prefix="zotero") as pool:
+            batch_results = list(pool.map(self._send_batch, batches))
+        for outcome in (outcome for batch in batch_results for outcome in batch):
+            outcome["index"] = len(result.items)
+            result.items.append(outcome)
+            if outcome["status"] == "created":
+                result.created += 1
+            else:
+                result.failed += 1
+        return result
+
+    def export_citations(self, citations) -> ZoteroExportResult:
+        """
+        export() for Citation rows; each item result also carries citation_id.
+        """
+        result = self.export([zotero_item(citation) for citation in citations])
+        for citation, outcome in zip(citations, result.items):
+            outcome["citation_id"] = citation.id
+        return result
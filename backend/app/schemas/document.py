@@ -1,7 +1,10 @@
 # app/schemas/document.py
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+from datetime import datetime
 from enum import Enum
+from .summary import SummaryRead
+from .citation import CitationRead
 
 class DocumentStatus(str, Enum):
     PENDING = "PENDING"
@@ -31,3 +34,12 @@ class DocumentStatusResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+class DocumentListItem(DocumentRead):
+    created_at: Optional[datetime] = None
+    summary_snippet: Optional[str] = None
+
+class DocumentFull(DocumentRead):
+    created_at: Optional[datetime] = None
+    summary: Optional[SummaryRead] = None
+    citations: List[CitationRead] = []
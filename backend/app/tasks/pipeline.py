@@ -0,0 +1,53 @@
+# app/tasks/pipeline.py
+
+from dataclasses import dataclass
+from typing import Any, Callable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+@dataclass
+class Stage:
+    """
+    One step of a document job. `fn` receives the results of the stages finished
+    so far (keyed by stage name) and may only rely on those listed in `deps`.
+    `weight` is the stage's share of the progress range.
+    """
+    name: str
+    fn: Callable[[dict], Any]
+    deps: tuple = ()
+    weight: int = 1
+
+def run_stage_graph(stages: list[Stage], max_workers: int, on_stage_done: Callable[[Stage, dict], None] = None) -> dict:
+    """
+    Run stages on a thread pool, each as soon as its dependencies have finished,
+    and return {stage name: result}. on_stage_done(stage, results) is called in
+    the caller's thread after every stage, so it can safely use the caller's DB
+    session. The first stage to raise aborts the graph; stages not yet started
+    are dropped and the exception propagates.
+    """
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = set(stage.deps) - names
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {sorted(missing)}")
+
+    results = {}
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+    try:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    running[pool.submit(stage.fn, dict(results))] = stage
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Stage graph has a dependency cycle: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                results[stage.name] = future.result()
+                if on_stage_done:
+                    on_stage_done(stage, results)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return results
@@ -1,41 +1,67 @@
 # app/tasks/process_document.py
 
 import os
-#from celery import shared_task
 from sqlalchemy.orm import Session
 import logging
-from fastapi import UploadFile
 from ..core.config import settings
+from ..core.celery_app import celery_app
+from ..core.events import publish_progress
 from ..database import SessionLocal
 from ..crud import document as crud_doc
-from ..crud import summary as crud_sum
-from ..crud import citation as crud_cit
-from ..utils.pdf_parser import extract_text_from_pdf
+from ..utils.text_cache import get_document_text
 from ..utils.summarizer import generate_structured_summary, generate_eli5_summary
 from ..utils.citation_extractor import extract_reference_section, extract_citations_from_references, bibtex_to_fields
+from ..utils.reference_parser import count_citation_lines
+from .pipeline import Stage, run_stage_graph
+from .progress import ProgressReporter
+from .recommendations import queue_recommendations
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-#@shared_task(bind=True)
+@celery_app.task(bind=True, name="app.tasks.process_document")
 def process_document(self, document_id: int, generate_eli5: bool = False):
     """
-    Fucntions without celery temporarily
+    Background job run by the Celery worker pool:
     1. Mark document as PROCESSING
     2. Extract text (OCR if needed)
-    3. Summarize into sections
-    4. Extract references and parse into BibTeX
-    5. Save Summary and Citation rows
+    3. Concurrently: summarize into sections, write the optional ELI5 summary,
+       and extract references and parse them into BibTeX
+    4-5. Save Summary and Citation rows (one transaction, safe to repeat)
     6. Mark document as COMPLETED (or FAILED on exception)
+    7. Queue the related-paper lookup (compute_recommendations)
     """
     db: Session = SessionLocal()
+    db_doc = None
     try:
         # 1. Fetch Document
         logger.info(f"Starting process_document for ID: {document_id}")
         db_doc = crud_doc.get_document(db, document_id)
-        if not db_doc:
+        if not db_doc or db_doc.status == crud_doc.DocumentStatus.COMPLETED:
             return
-        crud_doc.update_document_status(db, document_id, crud_doc.DocumentStatus.PROCESSING, progress=10)
+
+        # Byte-identical uploads: reuse finished results, or let the job already
+        # working on the same file fill this document in when it completes
+        if db_doc.file_hash:
+            source = crud_doc.get_completed_document_by_hash(db, db_doc.file_hash)
+            if source and crud_doc.clone_document_results(db, source.id, document_id):
+                publish_progress(document_id, crud_doc.DocumentStatus.COMPLETED, 100, "done")
+                if source.recommendations is None:
+                    queue_recommendations(document_id)
+                logger.info(f"Document {document_id} cloned from identical Document {source.id}.")
+                return
+
+        # Fails while another job is PROCESSING the same file; that job fills
+        # this document in (or fails it) when it finishes
+        if not crud_doc.claim_document(db, document_id, file_hash=db_doc.file_hash):
+            db.refresh(db_doc)
+            if db_doc.status == crud_doc.DocumentStatus.PENDING:
+                logger.info(f"Document {document_id} waits on an in-flight identical document.")
+            else:
+                logger.info(f"Document {document_id} was completed elsewhere; nothing to do.")
+            return
+        progress = ProgressReporter(db, document_id, stage="extracting")
+        progress.update(10)
         logger.info(f"Document {document_id} fetched. Status updated to PROCESSING (10%). File Path: {db_doc.file_path}")
 
         pdf_path = db_doc.file_path
@@ -45,95 +71,153 @@ def process_document(self, document_id: int, generate_eli5: bool = False):
 
         # 2. Extract full text (OCR if necessary)
         logger.info(f"Attempting to extract text from PDF: {pdf_path}")
-        full_text = extract_text_from_pdf(pdf_path) # <--- THIS IS THE PRIMARY SUSPECT
+        full_text = get_document_text(pdf_path, sha256=db_doc.file_hash)
         logger.info(f"Text extraction completed for Document {document_id}. Text length: {len(full_text)} characters.")
-        crud_doc.update_document_status(db, document_id, crud_doc.DocumentStatus.PROCESSING, progress=30)
+        progress.update(30, stage="analyzing")
         logger.info(f"Document {document_id} status updated to PROCESSING (30%).")
 
-        logger.info(f"Attempting to generate structured summary for Document {document_id}.")
-        summary_dict = generate_structured_summary(full_text)
-        logger.info(f"Summary generation completed for Document {document_id}.")
-        crud_doc.update_document_status(db, document_id, crud_doc.DocumentStatus.PROCESSING, progress=60)
-        logger.info(f"Document {document_id} status updated to PROCESSING (60%).")
+        # 3. Summary, ELI5 and citation extraction only depend on full_text, so
+        #    they run concurrently; DB writes happen after they have all joined
+        def summary_stage(results):
+            logger.info(f"Attempting to generate structured summary for Document {document_id}.")
+            summary_dict = generate_structured_summary(full_text)
+            if not any(summary_dict.get(key) for key in ("introduction", "methods", "results", "conclusion")):
+                # Would complete the document with nothing to show (and be cloned to identical uploads)
+                raise ValueError("Summary came back empty")
+            logger.info(f"Summary generation completed for Document {document_id}.")
+            return summary_dict
 
-        # Generate ELI5 summary if requested
-        eli5_summary = None
-        if generate_eli5:
+        def eli5_stage(results):
             logger.info(f"Generating ELI5 summary for Document {document_id}.")
             try:
                 eli5_summary = generate_eli5_summary(full_text)
                 logger.info(f"ELI5 summary generated for Document {document_id}.")
+                return eli5_summary
             except Exception as e:
                 logger.warning(f"Failed to generate ELI5 summary for Document {document_id}: {e}")
-                eli5_summary = None
-
-        # 4. Save Summary in DB
-        logger.info(f"Attempting to save summary for Document {document_id}.")
-        crud_sum.create_summary(
-            db,
-            document_id=document_id,
-            introduction=summary_dict.get("introduction", ""),
-            methods=summary_dict.get("methods", ""),
-            results=summary_dict.get("results", ""),
-            conclusion=summary_dict.get("conclusion", ""),
-            eli5_summary=eli5_summary,
-        )
-        logger.info(f"Summary saved for Document {document_id}.")
-
-        # 5. Extract reference section & parse citations
-        logger.info(f"Attempting to extract reference section for Document {document_id}.")
-        ref_text = extract_reference_section(full_text)
-        logger.info(f"Reference section extracted for Document {document_id}. Length: {len(ref_text)} characters.")
-        
-        if ref_text:
-            logger.info(f"Reference section preview: {ref_text[:200]}...")
-        else:
-            logger.warning(f"No reference section found for Document {document_id}. Full text length: {len(full_text)}")
-            # Try to find any citation-like patterns in the full text
-            import re
-            citation_patterns = [
-                r'\n\s*\d+\.\s*[A-Z][^.]*\.\s*\d{4}',
-                r'\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\d{4}',
-                r'\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\([^)]*\)'
-            ]
-            for pattern in citation_patterns:
-                matches = re.findall(pattern, full_text)
-                if matches:
-                    logger.info(f"Found {len(matches)} potential citations using pattern: {pattern}")
-                    break
-        
-        bib_list = extract_citations_from_references(ref_text)
-        logger.info(f"Citations extracted for Document {document_id}. Found {len(bib_list)} citations.")
-        
-        if bib_list:
-            logger.info(f"First citation preview: {bib_list[0][:100]}...")
-        else:
-            logger.warning(f"No citations extracted for Document {document_id}")
-
-        progress_step = 60
+                return None
+
+        def references_stage(results):
+            logger.info(f"Attempting to extract reference section for Document {document_id}.")
+            ref_text = extract_reference_section(full_text)
+            logger.info(f"Reference section extracted for Document {document_id}. Length: {len(ref_text)} characters.")
+            if ref_text:
+                logger.info(f"Reference section preview: {ref_text[:200]}...")
+            else:
+                logger.warning(f"No reference section found for Document {document_id}. Full text length: {len(full_text)}")
+                # Try to find any citation-like lines in the full text
+                found = count_citation_lines(full_text)
+                if found:
+                    logger.info(f"Found {found} potential citation lines in the full text.")
+            return ref_text
+
+        def citations_stage(results):
+            bib_list = extract_citations_from_references(results["references"])
+            logger.info(f"Citations extracted for Document {document_id}. Found {len(bib_list)} citations.")
+            if bib_list:
+                logger.info(f"First citation preview: {bib_list[0][:100]}...")
+            else:
+                logger.warning(f"No citations extracted for Document {document_id}")
+            return bib_list
+
+        stages = [
+            Stage("summary", summary_stage, weight=3),
+            Stage("references", references_stage, weight=1),
+            Stage("citations", citations_stage, deps=("references",), weight=3),
+        ]
+        if generate_eli5:
+            stages.append(Stage("eli5", eli5_stage, weight=2))
+        total_weight = sum(stage.weight for stage in stages)
+        done_weight = 0
+
+        def on_stage_done(stage, results):
+            nonlocal done_weight
+            done_weight += stage.weight
+            percent = 30 + 45 * done_weight // total_weight
+            progress.update(percent, force=True)
+            logger.info(f"Document {document_id} stage '{stage.name}' done ({percent}%).")
+
+        results = run_stage_graph(stages, max_workers=len(stages), on_stage_done=on_stage_done)
+        summary_dict = results["summary"]
+        eli5_summary = results.get("eli5")
+        bib_list = results["citations"]
+
+        # 4-5. Save Summary and parsed citations in one transaction. A redelivered
+        #      job may get here a second time, so this overwrites rather than inserts.
+        progress.update(75, stage="saving")
+        citation_rows = []
         for bibtex_str in bib_list:
             fields = bibtex_to_fields(bibtex_str)
-            crud_cit.create_citation(
-                db,
-                document_id=document_id,
-                raw_bibtex=bibtex_str,
-                apa_text=fields.get("title", "") + ", " + fields.get("year", ""),
-                doi=fields.get("doi", None),
-                title=fields.get("title", None),
-                authors=" and ".join(fields.get("author", "").split(" and ")),
-                year=fields.get("year", None),
-            )
-            progress_step += int(20 / max(len(bib_list), 1))
-            crud_doc.update_document_status(db, document_id, crud_doc.DocumentStatus.PROCESSING, progress=progress_step)
-        logger.info(f"Citations saved for Document {document_id}.")
-
+            citation_rows.append({
+                "raw_bibtex": bibtex_str,
+                "apa_text": fields.get("title", "") + ", " + fields.get("year", ""),
+                "doi": fields.get("doi", None),
+                "title": fields.get("title", None),
+                "authors": " and ".join(fields.get("author", "").split(" and ")),
+                "year": fields.get("year", None),
+            })
+        logger.info(f"Attempting to save summary and {len(citation_rows)} citations for Document {document_id}.")
+        crud_doc.save_document_results(db, document_id, summary_dict, eli5_summary=eli5_summary, citations=citation_rows)
+        progress.update(95)
+        logger.info(f"Summary and citations saved for Document {document_id}.")
 
         # 6. Completed
-        crud_doc.update_document_status(db, document_id, crud_doc.DocumentStatus.COMPLETED, progress=100)
+        progress.finish(crud_doc.DocumentStatus.COMPLETED, progress=100)
         logger.info(f"Document {document_id} processing COMPLETED.")
+        queue_recommendations(document_id)
+
+        if db_doc.file_hash:
+            for follower in crud_doc.get_pending_documents_by_hash(db, db_doc.file_hash, exclude_id=document_id):
+                if crud_doc.clone_document_results(db, document_id, follower.id):
+                    publish_progress(follower.id, crud_doc.DocumentStatus.COMPLETED, 100, "done")
+                    # The clone may predate this document's stored recommendations
+                    queue_recommendations(follower.id)
+                    logger.info(f"Document {follower.id} filled in from identical Document {document_id}.")
     except Exception as e:
         logger.exception(f"FATAL ERROR during document processing for ID {document_id}. Exception: {e}") # This will print the full traceback
-        crud_doc.update_document_status(db, document_id, crud_doc.DocumentStatus.FAILED)
-        raise e # Re-raise to ensure the 500 error is returned by FastAPI
+        db.rollback()
+        failed = crud_doc.update_document_status(db, document_id, crud_doc.DocumentStatus.FAILED)
+        publish_progress(document_id, crud_doc.DocumentStatus.FAILED, failed.progress if failed else 0, "done")
+        if db_doc and db_doc.file_hash:
+            # Identical uploads waiting on this job would fail the same way
+            for follower in crud_doc.get_pending_documents_by_hash(db, db_doc.file_hash, exclude_id=document_id):
+                crud_doc.update_document_status(db, follower.id, crud_doc.DocumentStatus.FAILED)
+                publish_progress(follower.id, crud_doc.DocumentStatus.FAILED, 0, "done")
+        raise e # Re-raise so Celery records the task as failed
+    finally:
+        db.close()
+
+@celery_app.task(name="app.tasks.recover_stale_documents", ignore_result=True)
+def recover_stale_documents():
+    """
+    Sweep for jobs that died without finishing (worker killed, API restarted
+    mid-job in eager mode, failure handler that raised): their documents stay
+    PROCESSING, and identical uploads queued behind them stay PENDING. Each
+    document past DOCUMENT_PROCESSING_LEASE_SECONDS is marked FAILED and the
+    oldest PENDING identical upload is re-queued; its job fills in the others
+    when it completes. Runs every DOCUMENT_RECOVERY_INTERVAL_SECONDS (see
+    celery_app.beat_schedule and the API startup hook in eager mode).
+    """
+    db: Session = SessionLocal()
+    try:
+        for stale in crud_doc.get_stale_processing_documents(db):
+            if not crud_doc.fail_stale_document(db, stale.id):
+                continue
+            logger.warning(f"Document {stale.id} was PROCESSING past its lease; marked FAILED.")
+            publish_progress(stale.id, crud_doc.DocumentStatus.FAILED, stale.progress or 0, "done")
+            if not stale.file_hash:
+                continue
+            followers = crud_doc.get_pending_documents_by_hash(db, stale.file_hash, exclude_id=stale.id)
+            if not followers:
+                continue
+            successor = min(followers, key=lambda doc: doc.id)
+            try:
+                process_document.delay(successor.id)
+                logger.info(f"Re-queued Document {successor.id}, which waited on stale Document {stale.id}.")
+            except Exception:
+                logger.exception(f"Could not re-queue Document {successor.id}; failing the identical uploads of Document {stale.id}.")
+                for follower in followers:
+                    crud_doc.update_document_status(db, follower.id, crud_doc.DocumentStatus.FAILED)
+                    publish_progress(follower.id, crud_doc.DocumentStatus.FAILED, 0, "done")
     finally:
         db.close()
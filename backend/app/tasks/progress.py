@@ -0,0 +1,44 @@
+# app/tasks/progress.py
+
+import time
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.events import publish_progress
+from ..crud import document as crud_doc
+
+class ProgressReporter:
+    """
+    Pushes a job's progress to the progress bus and keeps DB writes to stage
+    transitions and the terminal state. Ticks within a stage are coalesced: one
+    is published only once progress has advanced by at least PROGRESS_MIN_STEP
+    points or PROGRESS_MIN_INTERVAL_MS have passed since the last one.
+    """
+    def __init__(self, db: Session, document_id: int, stage: str = None, min_step: int = None, min_interval_ms: int = None):
+        self.db = db
+        self.document_id = document_id
+        # Stage already recorded in the DB (e.g. by claim_document)
+        self.stage = stage
+        self.min_step = settings.PROGRESS_MIN_STEP if min_step is None else min_step
+        self.min_interval = (settings.PROGRESS_MIN_INTERVAL_MS if min_interval_ms is None else min_interval_ms) / 1000
+        self.published = None
+        self.published_at = 0.0
+
+    def update(self, progress: int, stage: str = None, force: bool = False) -> bool:
+        stage = stage or self.stage
+        now = time.monotonic()
+        stage_changed = stage != self.stage
+        if not force and not stage_changed and self.published is not None:
+            if progress - self.published < self.min_step and now - self.published_at < self.min_interval:
+                return False
+        if stage_changed:
+            crud_doc.set_document_progress(self.db, self.document_id, crud_doc.DocumentStatus.PROCESSING, progress)
+            self.stage = stage
+        publish_progress(self.document_id, crud_doc.DocumentStatus.PROCESSING, progress, stage)
+        self.published = progress
+        self.published_at = now
+        return True
+
+    def finish(self, status: crud_doc.DocumentStatus, progress: int = None):
+        crud_doc.update_document_status(self.db, self.document_id, status, progress=progress)
+        final = progress if progress is not None else (self.published or 0)
+        publish_progress(self.document_id, status, final, "done")
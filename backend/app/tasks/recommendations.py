@@ -0,0 +1,62 @@
+# app/tasks/recommendations.py
+
+import logging
+from sqlalchemy.orm import Session
+from ..core.celery_app import celery_app
+from ..database import SessionLocal
+from ..crud import document as crud_doc
+from ..crud import summary as crud_sum
+from ..utils.text_cache import get_document_text
+from ..utils.research_paper_recommender import recommendation_service, RecommendationError
+
+logger = logging.getLogger(__name__)
+
+def recommendation_text(db: Session, db_doc) -> str:
+    """
+    Text recommendations are searched from: the summary sections, or the
+    document's full text if it has no summary.
+    """
+    db_summary = crud_sum.get_summary_by_document(db, db_doc.id)
+    if db_summary:
+        return " ".join([
+            db_summary.introduction or "",
+            db_summary.methods or "",
+            db_summary.results or "",
+            db_summary.conclusion or "",
+        ])
+    return get_document_text(db_doc.file_path, sha256=db_doc.file_hash)
+
+def queue_recommendations(document_id: int):
+    """
+    Schedule compute_recommendations without letting a broker problem fail the
+    caller; the endpoint computes on demand when nothing was stored.
+    """
+    try:
+        compute_recommendations.delay(document_id)
+    except Exception as e:
+        logger.warning(f"Could not queue recommendations for Document {document_id}: {e}")
+
+@celery_app.task(name="app.tasks.compute_recommendations", ignore_result=True)
+def compute_recommendations(document_id: int):
+    """
+    Look up related papers for a completed document and store them on the row,
+    so GET /documents/{id}/recommendations is a plain read. Nothing is stored
+    if Semantic Scholar fails.
+    """
+    db = SessionLocal()
+    try:
+        db_doc = crud_doc.get_document(db, document_id)
+        if not db_doc or db_doc.status != crud_doc.DocumentStatus.COMPLETED:
+            return
+        text = recommendation_text(db, db_doc)
+        if not text.strip():
+            return
+        try:
+            papers = recommendation_service.recommend(text)
+        except RecommendationError as e:
+            logger.warning(f"Recommendations for Document {document_id} not stored: {e}")
+            return
+        crud_doc.set_document_recommendations(db, document_id, papers)
+        logger.info(f"Stored {len(papers)} recommendations for Document {document_id}.")
+    finally:
+        db.close()
@@ -3,52 +3,35 @@
 import re
 import os
 import json
+import time
+import asyncio
+import logging
 import bibtexparser
-from groq import Groq
+from . import reference_parser
+from .llm_gateway import gateway
 from ..core.config import settings
 
-client = Groq(api_key=settings.GROQ_API_KEY)
+logger = logging.getLogger(__name__)
 
 def extract_reference_section(full_text: str) -> str:
     """
     Enhanced reference section extraction that handles various academic paper formats.
     Looks for multiple patterns and uses heuristics to find the most likely reference section.
     """
-    # Common patterns for reference sections
-    patterns = [
-        r"\n\s*(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*\n",
-        r"\n\s*(REFERENCES?|BIBLIOGRAPHY|LITERATURE CITED|WORKS CITED|SOURCES?)\s*\n",
-        r"\n\s*(\d+\.\s*)?(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*\n",
-        r"\n\s*(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*$",
-        r"^\s*(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*\n",
-    ]
-    
-    # Try to find reference section using patterns
-    for pattern in patterns:
-        matches = re.finditer(pattern, full_text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
-            start_pos = match.end()
-            # Get text from this point to the end
-            ref_text = full_text[start_pos:].strip()
-            if ref_text and len(ref_text) > 50:  # Ensure we have substantial content
-                return ref_text
+    # Heading-delimited section, located from the end of the document
+    span = reference_parser.locate_reference_section(full_text)
+    if span:
+        ref_text = full_text[span[0]:span[1]].strip()
+        if len(ref_text) > 50:  # Ensure we have substantial content
+            return ref_text
     
     # Fallback: look for common citation patterns in the last 20% of the document
     # Academic papers typically have references at the end
     last_portion = full_text[-len(full_text)//5:]  # Last 20%
     
-    # Look for numbered or lettered lists that might be references
-    citation_patterns = [
-        r"\n\s*\d+\.\s*[A-Z][^.]*\.\s*\d{4}",  # Numbered references with year
-        r"\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\d{4}",  # Author, Initial. Year format
-        r"\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\d{4}",  # Multiple authors
-        r"\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\([^)]*\)",  # Author with parentheses
-    ]
-    
-    for pattern in citation_patterns:
-        if re.search(pattern, last_portion, re.MULTILINE):
-            # Found citation-like patterns, return the last portion
-            return last_portion
+    # Look for numbered or author-led lines that might be references
+    if reference_parser.has_citation_lines(last_portion):
+        return last_portion
     
     # Final fallback: try to extract any text that looks like citations from the entire document
     return _extract_citations_from_full_text(full_text)
@@ -59,17 +42,7 @@ def _extract_citations_from_full_text(full_text: str) -> str:
     This is used when no clear reference section is found.
     """
     # Look for patterns that indicate citations throughout the document
-    citation_indicators = [
-        r'[A-Z][a-z]+,\s*[A-Z]\.\s*\([^)]*\)[^.]*\.\s*[^.]*\.\s*[^,]*,\s*\d+[^,]*,\s*[^.]*',
-        r'[A-Z][a-z]+,\s*[A-Z]\.\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\([^)]*\)[^.]*\.\s*[^.]*\.\s*[^,]*,\s*\d+[^,]*,\s*[^.]*',
-        r'\n\s*\d+\.\s*[A-Z][^.]*\.\s*\d{4}',
-        r'\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\d{4}',
-    ]
-    
-    all_citations = []
-    for pattern in citation_indicators:
-        matches = re.findall(pattern, full_text, re.MULTILINE)
-        all_citations.extend(matches)
+    all_citations = reference_parser.find_citation_runs(full_text)
     
     if all_citations:
         # Return all found citations joined together
@@ -91,77 +64,172 @@ def extract_citations_from_references(ref_text: str) -> list[str]:
         return llm_citations
     
     # Strategy 2: Fallback to regex-based extraction
-    regex_citations = _extract_citations_with_regex(ref_text)
+    regex_citations = reference_parser.parse_references(ref_text)
     if regex_citations:
         return regex_citations
     
     return []
 
-def _extract_citations_with_llm(ref_text: str) -> list[str]:
+def batch_reference_entries(entries: list[str], max_tokens: int, max_entries: int) -> list[list[str]]:
     """
-    Use LLM to extract citations with a more flexible approach.
+    Greedily pack consecutive entries into batches of at most ~max_tokens prompt
+    tokens and max_entries entries (which bounds the BibTeX the model must write back).
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for entry in entries:
+        tokens = len(entry) // 4 + 1
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_entries):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(entry)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _parse_bibtex_entries(content: str) -> list[str]:
+    """
+    Pull the @type{...} entries out of an LLM response.
     """
+    bibtex_entries = []
+    current_entry = ""
+    for line in content.split('\n'):
+        line = line.strip()
+        if line.startswith('@'):
+            if current_entry:
+                bibtex_entries.append(current_entry.strip())
+            current_entry = line
+        elif line and current_entry:
+            current_entry += "\n" + line
+    if current_entry:
+        bibtex_entries.append(current_entry.strip())
+
+    # Validate entries
+    return [entry for entry in bibtex_entries if entry.startswith('@') and len(entry) > 20]
+
+def _normalize_title(title: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", title.lower())
+
+def _normalize_doi(doi: str) -> str:
+    doi = doi.strip().lower()
+    return re.sub(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", "", doi)
+
+def dedupe_bibtex_entries(entries: list[str]) -> list[str]:
+    """
+    Drop entries whose normalized DOI or title was already seen, keeping the first.
+    """
+    seen = set()
+    unique = []
+    for entry in entries:
+        fields = bibtex_to_fields(entry)
+        keys = set()
+        if fields.get("doi"):
+            keys.add(("doi", _normalize_doi(fields["doi"])))
+        if fields.get("title"):
+            keys.add(("title", _normalize_title(fields["title"])))
+        if keys & seen:
+            continue
+        seen |= keys
+        unique.append(entry)
+    return unique
+
+async def _convert_batch_with_llm(index: int, batch: list[str]) -> tuple[list[str], dict]:
+    numbered = "\n".join(f"[{i + 1}] {entry}" for i, entry in enumerate(batch))
     prompt = f"""
-    Extract all citations from this reference section and convert them to BibTeX format.
+    Convert each of the following {len(batch)} references to a BibTeX entry.
     
     Rules:
-    1. Each citation should be a complete BibTeX entry
+    1. Output exactly one complete BibTeX entry per reference, in the same order
     2. Use @article for journal papers, @inproceedings for conference papers, @book for books
     3. Generate a unique key for each entry (e.g., author2024title)
-    4. Include all available fields (title, author, year, journal, etc.)
+    4. Include all available fields (title, author, year, journal, doi, etc.)
     5. If information is missing, make reasonable assumptions
     
-    Reference section:
-    {ref_text[:2000]}  # Limit to first 2000 chars to avoid token limits
+    References:
+    {numbered}
     
     Return ONLY the BibTeX entries, one per line, starting with @.
     """
-    
+    start = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
+        content = await gateway.achat(
             messages=[
                 {"role": "system", "content": "You are an expert at converting academic references to BibTeX format. Return only BibTeX entries, no explanations."},
                 {"role": "user", "content": prompt}
             ],
-            max_tokens=2000,
+            # Roughly 150 output tokens per BibTeX entry
+            max_tokens=min(4000, 150 * len(batch) + 200),
             temperature=0.1
         )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Parse the response to extract BibTeX entries
-        bibtex_entries = []
-        lines = content.split('\n')
-        current_entry = ""
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('@'):
-                if current_entry:
-                    bibtex_entries.append(current_entry.strip())
-                current_entry = line
-            elif line and current_entry:
-                current_entry += "\n" + line
-        
-        if current_entry:
-            bibtex_entries.append(current_entry.strip())
-        
-        # Validate entries
-        valid_entries = []
-        for entry in bibtex_entries:
-            if entry.startswith('@') and len(entry) > 20:
-                valid_entries.append(entry)
-        
-        return valid_entries
-        
+        entries = _parse_bibtex_entries(content.strip())
+        error = None
+    except Exception as e:
+        # Keep this batch's recall with the regex converter rather than losing it
+        logger.error(f"Error extracting citations with LLM (batch {index}): {e}")
+        entries = reference_parser.parse_references("\n".join(batch))
+        error = str(e)
+    stats = {
+        "batch": index,
+        "references": len(batch),
+        "entries": len(entries),
+        "seconds": round(time.perf_counter() - start, 3),
+        "error": error,
+    }
+    return entries, stats
+
+async def _convert_batches(batches: list[list[str]]) -> list[tuple[list[str], dict]]:
+    limit = asyncio.Semaphore(settings.CITATION_MAX_CONCURRENCY)
+
+    async def limited(index, batch):
+        async with limit:
+            return await _convert_batch_with_llm(index, batch)
+
+    return await asyncio.gather(*(limited(i, batch) for i, batch in enumerate(batches)))
+
+def extract_citations_with_llm_batched(ref_text: str) -> tuple[list[str], list[dict]]:
+    """
+    Convert the whole reference section to BibTeX: split it into entries, pack
+    them into batches (CITATION_BATCH_TOKENS / CITATION_BATCH_MAX_ENTRIES), convert the batches
+    concurrently through the rate-limited LLM gateway, then merge in order and
+    de-duplicate by DOI/title. Returns (bibtex entries, per-batch stats).
+    """
+    entries = reference_parser.split_reference_entries(ref_text)
+    if not entries:
+        return [], []
+    batches = batch_reference_entries(entries, settings.CITATION_BATCH_TOKENS, settings.CITATION_BATCH_MAX_ENTRIES)
+    converted = gateway.run(_convert_batches(batches))
+
+    bibtex_entries = []
+    batch_stats = []
+    for batch_entries, stats in converted:
+        bibtex_entries.extend(batch_entries)
+        batch_stats.append(stats)
+        logger.info(
+            f"Citation batch {stats['batch']}: {stats['references']} references -> "
+            f"{stats['entries']} entries in {stats['seconds']}s"
+        )
+    return dedupe_bibtex_entries(bibtex_entries), batch_stats
+
+def _extract_citations_with_llm(ref_text: str) -> list[str]:
+    """
+    Use LLM to extract citations with a more flexible approach.
+    Covers the full reference section (see extract_citations_with_llm_batched).
+    """
+    try:
+        bibtex_entries, _ = extract_citations_with_llm_batched(ref_text)
+        return bibtex_entries
     except Exception as e:
-        print(f"Error extracting citations with LLM: {e}")
+        logger.error(f"Error extracting citations with LLM: {e}")
         return []
 
 def _extract_citations_with_regex(ref_text: str) -> list[str]:
     """
     Fallback method using regex patterns to extract citations.
+    Superseded by reference_parser.parse_references; kept as the baseline for
+    benchmarks/bench_reference_parser.py.
     """
     citations = []
     
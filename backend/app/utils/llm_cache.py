@@ -0,0 +1,128 @@
+# app/utils/llm_cache.py
+
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def make_key(model: str, messages: list[dict], temperature: float, max_tokens: int, response_format: dict = None) -> str:
+    """
+    Stable hash of everything that determines a completion.
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response_format": response_format,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Two-level cache of LLM responses: an in-memory LRU in front of a SQLite file
+    shared by every process on the host. Entries expire after `ttl` seconds.
+    """
+    # Expired rows are swept from the SQLite file once every this many writes
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, row[1], row[0])
+        return row[0]
+
+    def put(self, key: str, value: str):
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+llm_cache = LLMResponseCache(
+    path=settings.LLM_CACHE_PATH,
+    max_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+    ttl=settings.LLM_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,292 @@
+# app/utils/llm_gateway.py
+
+import asyncio
+import random
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from groq import AsyncGroq, APIConnectionError, APIStatusError
+from .llm_cache import llm_cache, make_key
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+class LLMGatewayError(Exception):
+    """Raised when an LLM call fails for good (non-retryable error or retries exhausted)."""
+
+class TokenBucket:
+    """
+    Continuous-refill token bucket: `rate_per_minute` tokens are added per minute
+    up to `capacity`. acquire() waits until the requested amount is available;
+    waiters are served in arrival order.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+def process_rate_limits() -> tuple[float, float]:
+    """
+    (requests/min, tokens/min) this process may use: its slice of the account
+    limits for its DB_ROLE, see LLM_API_RATE_SHARE in app/core/config.py.
+    """
+    if settings.CELERY_TASK_ALWAYS_EAGER:
+        share, processes = 1.0, settings.LLM_API_PROCESSES
+    elif settings.DB_ROLE == "worker":
+        share = 1.0 - settings.LLM_API_RATE_SHARE
+        processes = settings.LLM_WORKER_PROCESSES or settings.CELERY_WORKER_CONCURRENCY
+    else:
+        share, processes = settings.LLM_API_RATE_SHARE, settings.LLM_API_PROCESSES
+    fraction = share / max(1, processes)
+    return settings.LLM_REQUESTS_PER_MINUTE * fraction, settings.LLM_TOKENS_PER_MINUTE * fraction
+
+def estimate_tokens(messages: list[dict]) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return sum(len(m.get("content") or "") for m in messages) // 4 + 4 * len(messages)
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+class LLMGateway:
+    """
+    Process-wide gateway for chat completions.
+
+    All calls run on one private event loop thread with a single AsyncGroq
+    client, so the concurrency semaphore and the requests/min and tokens/min
+    buckets really are shared by every caller in the process, whether it is a
+    Celery task, a sync route running in the threadpool or an async route.
+    Other processes have their own buckets, sized to this process's slice of
+    the account limits (process_rate_limits).
+    Rate-limited and transient failures are retried with jittered exponential
+    backoff, honouring the server's Retry-After when it sends one.
+
+    Responses are cached by (model, messages, temperature, max_tokens,
+    response_format); pass use_cache=False to force a fresh sample (the fresh
+    response still replaces the cached one). Streamed completions (astream)
+    share the same limits and cache entries.
+    """
+    def __init__(self):
+        self._loop = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True)
+                thread.start()
+                asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+                self._loop = loop
+        return self._loop
+
+    async def _setup(self):
+        self._client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.LLM_BASE_URL or None,
+            timeout=settings.LLM_TIMEOUT,
+            max_retries=0,  # retries are handled here, against the shared limits
+        )
+        self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        requests_per_minute, tokens_per_minute = process_rate_limits()
+        self._request_bucket = TokenBucket(requests_per_minute)
+        self._token_bucket = TokenBucket(tokens_per_minute)
+
+    async def _complete(self, **params):
+        return await self._client.chat.completions.create(**params)
+
+    async def _chat(self, messages: list[dict], model: str, max_tokens: int, temperature: float, response_format: dict = None, use_cache: bool = True) -> str:
+        cache_key = None
+        if settings.LLM_CACHE_ENABLED:
+            cache_key = make_key(model, messages, temperature, max_tokens, response_format)
+            if use_cache:
+                cached = await asyncio.to_thread(llm_cache.get, cache_key)
+                if cached is not None:
+                    return cached
+
+        content = await self._request(messages, model, max_tokens, temperature, response_format)
+        if cache_key and content:
+            await asyncio.to_thread(llm_cache.put, cache_key, content)
+        return content
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        Seconds to wait before retrying after `error`; raises LLMGatewayError if
+        the error is not retryable or the retries are used up.
+        """
+        if not _is_retryable(error):
+            raise LLMGatewayError(f"LLM request failed: {error}") from error
+        if attempt == settings.LLM_MAX_RETRIES:
+            raise LLMGatewayError(f"LLM request failed after {attempt + 1} attempts: {error}") from error
+        retry_after = _retry_after_seconds(error)
+        backoff = min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2 ** attempt)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, settings.LLM_BACKOFF_BASE)
+        else:
+            delay = random.uniform(0, backoff)
+        logger.warning(f"LLM request failed ({error}); retry {attempt + 1}/{settings.LLM_MAX_RETRIES} in {delay:.1f}s")
+        return delay
+
+    async def _request(self, messages: list[dict], model: str, max_tokens: int, temperature: float, response_format: dict = None) -> str:
+        params = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+        if response_format:
+            params["response_format"] = response_format
+        budget = estimate_tokens(messages) + max_tokens
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            try:
+                async with self._semaphore:
+                    await self._request_bucket.acquire(1)
+                    await self._token_bucket.acquire(budget)
+                    response = await self._complete(**params)
+                return response.choices[0].message.content or ""
+            except Exception as e:
+                await asyncio.sleep(self._retry_delay(e, attempt))
+
+    async def _stream(self, emit, messages: list[dict], model: str, max_tokens: int, temperature: float, use_cache: bool = True) -> str:
+        """
+        Streamed completion: emit(piece) is called with each content delta as it
+        arrives (once with the whole text on a cache hit). Only failures before
+        the first piece are retried; the assembled text is cached like chat().
+        """
+        cache_key = None
+        if settings.LLM_CACHE_ENABLED:
+            cache_key = make_key(model, messages, temperature, max_tokens)
+            if use_cache:
+                cached = await asyncio.to_thread(llm_cache.get, cache_key)
+                if cached is not None:
+                    emit(cached)
+                    return cached
+
+        params = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature, "stream": True}
+        budget = estimate_tokens(messages) + max_tokens
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            parts = []
+            try:
+                async with self._semaphore:
+                    await self._request_bucket.acquire(1)
+                    await self._token_bucket.acquire(budget)
+                    stream = await self._complete(**params)
+                    async for chunk in stream:
+                        piece = chunk.choices[0].delta.content if chunk.choices else None
+                        if piece:
+                            parts.append(piece)
+                            emit(piece)
+                break
+            except Exception as e:
+                if parts:
+                    raise LLMGatewayError(f"LLM stream interrupted: {e}") from e
+                await asyncio.sleep(self._retry_delay(e, attempt))
+
+        content = "".join(parts)
+        if cache_key and content:
+            await asyncio.to_thread(llm_cache.put, cache_key, content)
+        return content
+
+    def run(self, coro):
+        """
+        Run a coroutine on the gateway loop and block until it finishes. Lets sync
+        code fan out several achat() calls with asyncio.gather.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_started()).result()
+
+    def chat(self, messages: list[dict], model: str = DEFAULT_MODEL, max_tokens: int = 1000, temperature: float = 0.2, response_format: dict = None, use_cache: bool = True) -> str:
+        """
+        Blocking chat completion; returns the message content.
+        """
+        return self.run(self._chat(messages, model, max_tokens, temperature, response_format, use_cache))
+
+    async def achat(self, messages: list[dict], model: str = DEFAULT_MODEL, max_tokens: int = 1000, temperature: float = 0.2, response_format: dict = None, use_cache: bool = True) -> str:
+        """
+        Awaitable chat completion, usable from any event loop.
+        """
+        loop = self._ensure_started()
+        coro = self._chat(messages, model, max_tokens, temperature, response_format, use_cache)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def astream(self, messages: list[dict], model: str = DEFAULT_MODEL, max_tokens: int = 1000, temperature: float = 0.2, use_cache: bool = True):
+        """
+        Async iterator over the pieces of a streamed completion, usable from any
+        event loop. The request runs on the gateway loop and pieces are handed
+        over through a queue on the caller's loop; closing the iterator early
+        (e.g. the client disconnected) cancels the request.
+        """
+        loop = self._ensure_started()
+        caller = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        finished = object()
+
+        def emit(item):
+            caller.call_soon_threadsafe(queue.put_nowait, item)
+
+        async def produce():
+            try:
+                await self._stream(emit, messages, model, max_tokens, temperature, use_cache)
+            except Exception as e:
+                emit(e)
+            else:
+                emit(finished)
+
+        if caller is loop:
+            future = asyncio.ensure_future(produce())
+        else:
+            future = asyncio.run_coroutine_threadsafe(produce(), loop)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+gateway = LLMGateway()
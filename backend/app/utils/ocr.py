@@ -1,18 +1,235 @@
 # app/utils/ocr.py
 
+import os
+import time
+import logging
+import statistics
 import tempfile
-from pdf2image import convert_from_path
+from dataclasses import dataclass
+import fitz
+from PIL import Image
 import pytesseract
+from ..core.config import settings
 
-def run_ocr_if_needed(pdf_path: str, page_num: int) -> str:
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class OcrTier:
+    target_glyph_px: int      # rendered text-line height tesseract should see
+    min_dpi: int
+    max_dpi: int
+    max_megapixels: float     # caps render size for very large pages
+    binarize: bool            # Otsu-threshold the grayscale render before tesseract
+    min_confidence: float     # retry once at a higher DPI below this mean word confidence (pages with words only)
+    retry_factor: float
+
+OCR_TIERS = {
+    "fast": OcrTier(target_glyph_px=20, min_dpi=100, max_dpi=200, max_megapixels=4, binarize=True, min_confidence=0, retry_factor=1.0),
+    "balanced": OcrTier(target_glyph_px=28, min_dpi=150, max_dpi=300, max_megapixels=9, binarize=True, min_confidence=60, retry_factor=1.5),
+    "accurate": OcrTier(target_glyph_px=36, min_dpi=200, max_dpi=400, max_megapixels=16, binarize=False, min_confidence=75, retry_factor=1.5),
+}
+
+@dataclass
+class OcrPageResult:
+    page_num: int
+    text: str
+    mode: str
+    dpi: int
+    confidence: float         # mean tesseract word confidence, 0..100 (-1 if no words)
+    seconds: float            # render time plus this page's share of the batch run
+    attempts: int = 1
+
+# Assumed line height (points) when a page gives no usable ink profile
+_DEFAULT_GLYPH_PT = 10.0
+_ESTIMATE_DPI = 100
+_DARK_BYTES = bytes(range(160))
+
+def estimate_glyph_height(page: fitz.Page) -> float:
+    """
+    Estimate the typical text-line height of a scanned page, in points, from the
+    horizontal ink profile of a cheap low-resolution grayscale render.
+    """
+    pix = page.get_pixmap(dpi=_ESTIMATE_DPI, colorspace=fitz.csGRAY)
+    width, samples, stride = pix.width, pix.samples, pix.stride
+    min_ink = max(2, width // 200)
+    run_lengths = []
+    run = 0
+    for y in range(pix.height):
+        row = samples[y * stride:y * stride + width]
+        if width - len(row.translate(None, _DARK_BYTES)) >= min_ink:
+            run += 1
+        elif run:
+            run_lengths.append(run)
+            run = 0
+    if run:
+        run_lengths.append(run)
+    # Ignore specks and figures: keep runs between ~3pt and one inch tall
+    run_lengths = [r for r in run_lengths if 2 <= r <= _ESTIMATE_DPI]
+    if not run_lengths:
+        return _DEFAULT_GLYPH_PT
+    return statistics.median(run_lengths) * 72 / _ESTIMATE_DPI
+
+def choose_dpi(page: fitz.Page, tier: OcrTier) -> int:
+    """
+    Pick a render DPI so text lines come out around tier.target_glyph_px tall,
+    clamped to the tier's DPI range and to its pixel budget for the page area.
+    """
+    glyph_pt = estimate_glyph_height(page)
+    dpi = tier.target_glyph_px * 72 / glyph_pt
+    dpi = min(max(dpi, tier.min_dpi), tier.max_dpi)
+    area_pt = max(page.rect.width * page.rect.height, 1)
+    budget_dpi = 72 * (tier.max_megapixels * 1_000_000 / area_pt) ** 0.5
+    return int(min(dpi, budget_dpi))
+
+def _otsu_threshold(img: Image.Image) -> int:
+    histogram = img.histogram()
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+    sum_bg = weight_bg = 0
+    best_threshold, best_variance = 127, 0.0
+    for i, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = i, variance
+    return best_threshold
+
+def _render_page(page: fitz.Page, dpi: int, tier: OcrTier, path_stem: str) -> tuple[str, int]:
+    """
+    Render a page to grayscale (binarized for tiers that ask for it) and write it
+    as uncompressed PNM, which tesseract reads natively. Returns (path, pixels).
+    """
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    pixels = pix.width * pix.height
+    if tier.binarize:
+        img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+        threshold = _otsu_threshold(img)
+        image_path = f"{path_stem}.pbm"
+        img.point(lambda p: 255 if p > threshold else 0, mode="1").save(image_path)
+    else:
+        image_path = f"{path_stem}.pgm"
+        pix.save(image_path)
+    return image_path, pixels
+
+def _pages_from_data(data: dict) -> dict[int, tuple[str, float]]:
+    """
+    Rebuild per-page text and mean word confidence from image_to_data output of a
+    multi-image run. Keys are tesseract's 1-based page_num.
+    """
+    lines = {}
+    confidences = {}
+    for i, word in enumerate(data["text"]):
+        word = str(word).strip()
+        if not word:
+            continue
+        page = int(data["page_num"][i])
+        key = (page, int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]))
+        lines.setdefault(key, []).append(word)
+        conf = float(data["conf"][i])
+        if conf >= 0:
+            confidences.setdefault(page, []).append(conf)
+
+    pages = {}
+    previous = {}
+    for (page, block, par, _line), words in lines.items():
+        text = pages.get(page, "")
+        if text:
+            text += "\n\n" if previous[page] != (block, par) else "\n"
+        pages[page] = text + " ".join(words)
+        previous[page] = (block, par)
+    return {
+        page: (pages.get(page, ""), statistics.fmean(confidences[page]) if confidences.get(page) else -1.0)
+        for page in set(pages) | set(confidences)
+    }
+
+def _ocr_batch(doc: fitz.Document, page_dpis: dict[int, int], tier: OcrTier, mode: str, tmp_dir: str) -> dict[int, OcrPageResult]:
+    """
+    Render the given pages and OCR them in a single tesseract run over an image list file.
+    """
+    image_paths = []
+    render_seconds = {}
+    pixels = {}
+    for page_num, dpi in page_dpis.items():
+        start = time.perf_counter()
+        image_path, pixels[page_num] = _render_page(doc.load_page(page_num), dpi, tier, os.path.join(tmp_dir, f"page-{page_num}-{dpi}"))
+        render_seconds[page_num] = time.perf_counter() - start
+        image_paths.append(image_path)
+
+    list_path = os.path.join(tmp_dir, "batch.txt")
+    with open(list_path, "w") as list_file:
+        list_file.write("\n".join(image_paths) + "\n")
+
+    start = time.perf_counter()
+    data = pytesseract.image_to_data(list_path, output_type=pytesseract.Output.DICT)
+    tesseract_seconds = time.perf_counter() - start
+    by_index = _pages_from_data(data)
+    total_pixels = sum(pixels.values()) or 1
+
+    results = {}
+    for index, (page_num, dpi) in enumerate(page_dpis.items(), start=1):
+        text, confidence = by_index.get(index, ("", -1.0))
+        results[page_num] = OcrPageResult(
+            page_num=page_num,
+            text=text,
+            mode=mode,
+            dpi=dpi,
+            confidence=confidence,
+            # tesseract time is only known per run; attribute it by pixel share
+            seconds=render_seconds[page_num] + tesseract_seconds * pixels[page_num] / total_pixels,
+        )
+    for image_path in image_paths:
+        os.remove(image_path)
+    return results
+
+def ocr_pages(doc: fitz.Document, page_numbers: list[int], mode: str = None, batch_size: int = None) -> dict[int, OcrPageResult]:
     """
-    Given a PDF path and a page number, convert that page to image
-    and run pytesseract OCR, returning extracted text.
+    OCR several pages of an already-open document.
+
+    Pages are rendered in memory by PyMuPDF (no poppler re-parse of the file) at a
+    DPI chosen per page from its size and estimated glyph height, converted to
+    grayscale/binarized images, and handed to tesseract as an image list file, so
+    each batch of up to OCR_BATCH_SIZE pages costs one tesseract start. Pages whose
+    mean word confidence falls below the tier threshold are retried once at a
+    higher DPI; pages where tesseract found no words at all (blank or figure-only
+    scans) are not. Returns {page_num: OcrPageResult}.
     """
-    # Convert only the specified page to an image
-    images = convert_from_path(pdf_path, first_page=page_num + 1, last_page=page_num + 1, dpi=300)
-    if not images:
-        return ""
-    img = images[0]
-    text = pytesseract.image_to_string(img)
-    return text
+    mode = mode or settings.OCR_MODE
+    tier = OCR_TIERS[mode]
+    batch_size = batch_size or settings.OCR_BATCH_SIZE
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="ocr_") as tmp_dir:
+        for batch_start in range(0, len(page_numbers), batch_size):
+            batch = page_numbers[batch_start:batch_start + batch_size]
+            page_dpis = {page_num: choose_dpi(doc.load_page(page_num), tier) for page_num in batch}
+            results.update(_ocr_batch(doc, page_dpis, tier, mode, tmp_dir))
+
+            retry_dpis = {}
+            for page_num in batch:
+                result = results[page_num]
+                retry_dpi = min(int(result.dpi * tier.retry_factor), tier.max_dpi)
+                # confidence is -1 when no words were found; a sharper render of an
+                # empty page is still empty
+                if 0 <= result.confidence < tier.min_confidence and retry_dpi > result.dpi:
+                    retry_dpis[page_num] = retry_dpi
+            if retry_dpis:
+                for page_num, retry in _ocr_batch(doc, retry_dpis, tier, mode, tmp_dir).items():
+                    first = results[page_num]
+                    best = retry if retry.confidence > first.confidence else first
+                    best.seconds = first.seconds + retry.seconds
+                    best.attempts = 2
+                    results[page_num] = best
+
+    for result in results.values():
+        logger.info(
+            f"OCR page {result.page_num}: mode={result.mode} dpi={result.dpi} "
+            f"confidence={result.confidence:.1f} attempts={result.attempts} time={result.seconds:.2f}s"
+        )
+    return results
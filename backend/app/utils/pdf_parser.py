@@ -2,40 +2,178 @@
 
 import os
 import fitz
-from .ocr import run_ocr_if_needed
+import atexit
+import threading
+from dataclasses import asdict
+import billiard
+from .ocr import ocr_pages, OcrPageResult
+from ..core.config import settings
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+def extract_text_from_pdf(pdf_path: str, workers: int = None) -> str:
     """
     Attempts to extract text directly via PyMuPDF. If the text is empty on a page,
     we assume it’s a scanned page and run OCR.
+
+    Long documents are extracted in parallel (see extract_pages_from_pdf_parallel).
     """
-    text_chunks = []
-    doc = fitz.open(pdf_path)
-    for page_num in range(doc.page_count):
-        page = doc.load_page(page_num)
-        page_text = page.get_text("text")
-        if page_text.strip() == "":
-            # Scanned page – run OCR
-            ocr_text = run_ocr_if_needed(pdf_path, page_num)
-            text_chunks.append(ocr_text)
-        else:
-            text_chunks.append(page_text)
-    full_text = "\n".join(text_chunks)
+    pages = extract_pages_from_pdf(pdf_path, workers=workers)
+    full_text = "\n".join(page["text"] for page in pages)
     return full_text
 
+def extract_pages_from_pdf(pdf_path: str, workers: int = None) -> list[dict]:
+    """
+    Per-page variant of extract_text_from_pdf. Each page is returned as
+    {"page": n, "text": ..., "ocr": None} or, for scanned pages, with "ocr" holding
+    the OCR mode, dpi, confidence, attempts and seconds.
+    """
+    workers = extract_workers() if workers is None else workers
+    with fitz.open(pdf_path) as doc:
+        if workers > 1 and doc.page_count >= settings.PDF_PARALLEL_MIN_PAGES:
+            return extract_pages_from_pdf_parallel(pdf_path, workers=workers, page_count=doc.page_count)
+        pages = []
+        blank_pages = []
+        for page_num in range(doc.page_count):
+            page = doc.load_page(page_num)
+            page_text = page.get_text("text")
+            if page_text.strip() == "":
+                # Scanned page – OCR it below together with the other blank pages
+                blank_pages.append(page_num)
+            pages.append(_text_page(page_num, page_text))
+        if blank_pages:
+            for page_num, result in ocr_pages(doc, blank_pages).items():
+                pages[page_num] = _ocr_page(result)
+    return pages
+
+def _text_page(page_num: int, text: str) -> dict:
+    return {"page": page_num, "text": text, "ocr": None}
+
+def _ocr_page(result: OcrPageResult) -> dict:
+    ocr_meta = asdict(result)
+    del ocr_meta["page_num"], ocr_meta["text"]
+    return {"page": result.page_num, "text": result.text, "ocr": ocr_meta}
+
+def extract_workers() -> int:
+    """
+    Extraction processes per job: PDF_EXTRACT_WORKERS, or when that is 0 the
+    CPUs divided among the Celery worker's concurrent jobs, so a busy worker
+    does not run more processes than there are cores.
+    """
+    if settings.PDF_EXTRACT_WORKERS > 0:
+        return settings.PDF_EXTRACT_WORKERS
+    return max(1, (os.cpu_count() or 1) // max(1, settings.CELERY_WORKER_CONCURRENCY))
+
+_pools: dict[str, tuple[int, billiard.Pool]] = {}
+_pools_lock = threading.Lock()
+
+def _shared_pool(name: str, workers: int) -> billiard.Pool:
+    """
+    Process-wide pool reused across jobs (instead of a new pool per document),
+    so concurrent jobs share the same processes rather than each starting
+    their own. Asking for a different size replaces the pool.
+
+    billiard (Celery's fork of multiprocessing) is used because its processes
+    may start children of their own: Celery's prefork pool children are
+    daemonic, and the standard library refuses to start a process pool there.
+    A pool process that dies is replaced by billiard; the job that was using
+    it fails with WorkerLostError.
+    """
+    with _pools_lock:
+        size, pool = _pools.get(name, (0, None))
+        if pool is None or size != workers:
+            if pool is not None:
+                pool.terminate()
+            pool = billiard.Pool(processes=workers)
+            _pools[name] = (workers, pool)
+        return pool
+
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for _size, pool in _pools.values():
+            pool.terminate()
+        _pools.clear()
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list[tuple[int, str]]:
+    """
+    Worker body: open a private fitz handle (they cannot be shared across
+    processes) and return (page_num, text) for pages in [start, stop).
+    """
+    with fitz.open(pdf_path) as doc:
+        return [(page_num, doc.load_page(page_num).get_text("text")) for page_num in range(start, stop)]
+
+def _ocr_page_batch(pdf_path: str, page_numbers: list[int]) -> dict[int, OcrPageResult]:
+    """
+    OCR pool worker body: render and OCR a batch of pages from a private fitz handle.
+    """
+    with fitz.open(pdf_path) as doc:
+        return ocr_pages(doc, page_numbers)
+
+def extract_text_from_pdf_parallel(pdf_path: str, workers: int = None, ocr_workers: int = None) -> str:
+    pages = extract_pages_from_pdf_parallel(pdf_path, workers=workers, ocr_workers=ocr_workers)
+    return "\n".join(page["text"] for page in pages)
+
+def extract_pages_from_pdf_parallel(pdf_path: str, workers: int = None, ocr_workers: int = None, page_count: int = None) -> list[dict]:
+    """
+    Split the page range into contiguous slices, extract each slice in the
+    shared extraction pool, send blank (scanned) pages to a separate,
+    size-limited OCR pool and reassemble everything in page order.
+    """
+    workers = workers or extract_workers()
+    ocr_workers = ocr_workers or settings.PDF_OCR_WORKERS
+    if page_count is None:
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+    if page_count == 0:
+        return []
+
+    # A few slices per worker evens out pages that are much slower than others
+    slice_size = max(1, -(-page_count // (workers * 4)))
+    ranges = [(start, min(start + slice_size, page_count)) for start in range(0, page_count, slice_size)]
+
+    pages = [None] * page_count
+    blank_pages = []
+    pool = _shared_pool("extract", workers)
+    slices = [pool.apply_async(_extract_page_range, (pdf_path, start, stop)) for start, stop in ranges]
+    for result in slices:
+        for page_num, page_text in result.get():
+            if page_text.strip() == "":
+                blank_pages.append(page_num)
+            pages[page_num] = _text_page(page_num, page_text)
+
+    if blank_pages:
+        blank_pages.sort()
+        batch_size = settings.OCR_BATCH_SIZE
+        batches = [blank_pages[i:i + batch_size] for i in range(0, len(blank_pages), batch_size)]
+        ocr_pool = _shared_pool("ocr", ocr_workers)
+        for results in ocr_pool.starmap(_ocr_page_batch, [(pdf_path, batch) for batch in batches]):
+            for page_num, result in results.items():
+                pages[page_num] = _ocr_page(result)
+
+    return pages
+
 def split_text_into_chunks(full_text: str, max_chars: int = 4000) -> list[str]:
     """
     Naïvely split by paragraphs until ~max_chars, so each chunk stays
     under LLM’s context window. You can also split by sentences.
     """
-    paragraphs = full_text.split("\n\n")
+    paragraphs = []
+    for para in full_text.split("\n\n"):
+        # PDF text often has no blank lines at all; cut oversized blocks so
+        # no chunk grows past max_chars
+        while len(para) > max_chars:
+            cut = para.rfind("\n", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            paragraphs.append(para[:cut])
+            para = para[cut:]
+        paragraphs.append(para)
     chunks = []
     current = ""
     for para in paragraphs:
         if len(current) + len(para) < max_chars:
             current += para + "\n\n"
         else:
-            chunks.append(current.strip())
+            if current.strip():
+                chunks.append(current.strip())
             current = para + "\n\n"
     if current.strip():
         chunks.append(current.strip())
@@ -0,0 +1,245 @@
+# app/utils/reference_parser.py
+
+"""
+Regex fallback for turning a reference section into BibTeX without the LLM.
+
+Every pattern is compiled once at import. Lines are classified with a single
+alternation match each, the reference list is split in one pass over its
+lines, and each entry is converted with one combined citation pattern instead
+of trying the formats one after another.
+"""
+
+import re
+
+# How a reference-list line opens; the first alternative that matches wins.
+# numbered: "[12] ...", "12. ...", "12) ..." (at most three digits, so a
+# wrapped "2019." is not mistaken for a number); bullet: "- ..." / "• ...";
+# author: a line opening with "Surname, I." (zero-width, the author stays in
+# the entry).
+_LINE_KIND = re.compile(
+    r"(?P<numbered>[ \t]*(?:\[\d{1,3}\]|\d{1,3}[.)](?!\d))[ \t]*)"
+    r"|(?P<bullet>[ \t]*[-•][ \t]*)"
+    r"|(?P<author>(?=[ \t]*[A-Z][A-Za-z'\-]+,[ \t]*[A-Z]\.))"
+    r"|(?P<blank>[ \t]*$)"
+)
+# Split styles in order of preference
+_STYLES = ("numbered", "author", "bullet", "blank")
+# Boundaries a style needs before split_reference_entries settles on it, so a
+# single wrapped line that happens to look like an entry start cannot cut an
+# otherwise unmarked list in two
+MIN_STYLE_BOUNDARIES = 3
+
+# Author, A. [& Author, B.] (Year). Title. then either
+#   Journal, Volume[(Issue)], Pages.   or   Publisher.
+_CITATION = re.compile(
+    r"(?P<author>[A-Z][a-z]+,\s*[A-Z]\.(?:\s*&\s*[A-Z][a-z]+,\s*[A-Z]\.)?)\s*"
+    r"\((?P<year>\d{4})\)\.\s*(?P<title>[^.]*)"
+    r"(?:\.\s*(?:"
+    r"(?P<journal>[^,]*),\s*(?P<volume>\d+)(?:\((?P<issue>\d+)\))?,\s*(?P<pages>[^.]*)"
+    r"|(?P<publisher>[^.]*)"
+    r"))?"
+)
+
+# Citation-shaped runs anywhere in a text, for when no list structure is found
+_CITATION_RUN = re.compile(
+    r"[A-Z][a-z]+,\s*[A-Z]\.\s*(?:[A-Z][a-z]+,\s*[A-Z]\.\s*)?\([^)]*\)[^.]*\.\s*[^.]*\.\s*[^,]*,\s*\d+[^,]*,\s*[^.]*"
+    r"|\n\s*\d+\.\s*[A-Z][^.]*\.\s*\d{4}"
+    r"|\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\d{4}"
+)
+
+# Line starts that look like a reference: "12. Title. 2019", "Smith, J. 2019",
+# "Smith, J. Doe, K. 2019", "Smith, J. (2019)"
+_CITATION_LINE = re.compile(
+    r"\n\s*(?:\d+\.\s*[A-Z][^.]*\.\s*\d{4}"
+    r"|[A-Z][a-z]+,\s*[A-Z]\.\s*(?:[A-Z][a-z]+,\s*[A-Z]\.\s*)?(?:\d{4}|\([^)]*\)))"
+)
+
+# Every _CITATION match contains "(Year)."; this literal-led scan is much
+# cheaper than trying _CITATION at every capital letter of a non-citation
+_YEAR_IN_PARENS = re.compile(r"\(\d{4}\)\.")
+
+_NON_ALPHA = re.compile(r"[^a-zA-Z]")
+
+MIN_ENTRY_CHARS = 20
+
+def convert_entry_to_bibtex(entry: str) -> str:
+    """
+    Convert one reference to a BibTeX @article, or "" if it does not look like
+    an author-year citation.
+    """
+    if not _YEAR_IN_PARENS.search(entry):
+        return ""
+    match = _CITATION.search(entry)
+    if not match:
+        return ""
+    author = match["author"].replace("&", "and").strip()
+    year = match["year"]
+    title = match["title"].strip()
+
+    author_part = _NON_ALPHA.sub("", author.split(",")[0]).lower()
+    title_part = _NON_ALPHA.sub("", title.split()[0]).lower() if title else "unknown"
+    fields = [
+        f"@article{{{author_part}{year}{title_part},",
+        f"  author = {{{author}}},",
+        f"  title = {{{title}}},",
+        f"  year = {{{year}}},",
+    ]
+    journal = match["journal"] if match["journal"] is not None else match["publisher"]
+    if journal and journal.strip():
+        fields.append(f"  journal = {{{journal.strip()}}},")
+    if match["volume"]:
+        fields.append(f"  volume = {{{match['volume']}}},")
+        if match["issue"]:
+            fields.append(f"  number = {{{match['issue']}}},")
+    if match["pages"] and match["pages"].strip():
+        fields.append(f"  pages = {{{match['pages'].strip()}}},")
+    fields.append("}")
+    return "\n".join(fields)
+
+def _classify_lines(lines: list[str]) -> dict[str, list[tuple[int, int]]]:
+    """
+    One pass over the lines: {style: [(line index, marker length), ...]}.
+    """
+    marks = {style: [] for style in _STYLES}
+    for i, line in enumerate(lines):
+        match = _LINE_KIND.match(line)
+        if match:
+            marks[match.lastgroup].append((i, match.end()))
+    return marks
+
+def _entries_for_style(lines: list[str], starts: list[tuple[int, int]], style: str) -> list[str]:
+    entries = []
+    if style == "blank":
+        current = []
+        blank = {i for i, _ in starts}
+        for i, line in enumerate(lines):
+            if i in blank:
+                if current:
+                    entries.append(" ".join(current))
+                current = []
+            else:
+                current.append(line)
+        if current:
+            entries.append(" ".join(current))
+    else:
+        # Text before the first marker is kept as an entry of its own
+        bounds = [(0, 0)] + starts + [(len(lines), 0)]
+        for (start, cut), (end, _) in zip(bounds, bounds[1:]):
+            if start < end:
+                entries.append(" ".join([lines[start][cut:]] + lines[start + 1:end]))
+    return _clean_entries(entries)
+
+def _clean_entries(entries: list[str]) -> list[str]:
+    entries = [" ".join(entry.split()) for entry in entries]
+    return [entry for entry in entries if len(entry) >= MIN_ENTRY_CHARS]
+
+def split_reference_entries(ref_text: str) -> list[str]:
+    """
+    Split a reference section into entries on the first style with at least
+    MIN_STYLE_BOUNDARIES boundaries (numbering, author line starts, bullets,
+    blank lines), otherwise one entry per line. Wrapped continuation lines stay
+    with their entry and no text is dropped, so the entries cover the section.
+    """
+    lines = ref_text.split("\n")
+    marks = _classify_lines(lines)
+    for style in _STYLES:
+        if len(marks[style]) >= MIN_STYLE_BOUNDARIES:
+            return _entries_for_style(lines, marks[style], style)
+    return _clean_entries(lines)
+
+def parse_references(ref_text: str) -> list[str]:
+    """
+    Regex-only conversion of a reference section to BibTeX entries. Split
+    styles are tried in order of preference until one yields citations; if
+    none does, citation-shaped runs anywhere in the text are converted.
+    """
+    # Nothing converts without a "(Year)." so skip splitting altogether
+    if not _YEAR_IN_PARENS.search(ref_text):
+        return []
+    lines = ref_text.split("\n")
+    marks = _classify_lines(lines)
+    for style in _STYLES:
+        if not marks[style]:
+            continue
+        citations = [
+            bibtex
+            for bibtex in map(convert_entry_to_bibtex, _entries_for_style(lines, marks[style], style))
+            if bibtex
+        ]
+        if citations:
+            return citations
+
+    return [bibtex for bibtex in map(convert_entry_to_bibtex, find_citation_runs(ref_text)) if bibtex]
+
+def find_citation_runs(text: str) -> list[str]:
+    """
+    Citation-shaped passages anywhere in `text`, in document order.
+    """
+    return [match.group(0) for match in _CITATION_RUN.finditer(text)]
+
+def has_citation_lines(text: str) -> bool:
+    return _CITATION_LINE.search(text) is not None
+
+def count_citation_lines(text: str) -> int:
+    return sum(1 for _ in _CITATION_LINE.finditer(text))
+
+# A reference-section heading alone on its line, optionally numbered ("7. References")
+_SECTION_HEADING = re.compile(
+    r"^[ \t]*(?:\d{1,2}\.?[ \t]*)?(?:references?|bibliography|literature cited|works cited|sources?)[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Headings that end the reference list when they follow it
+_TRAILING_HEADING = re.compile(
+    r"^[ \t]*(?:appendix|appendices|supplementary (?:material|information))\b[^\n]{0,80}$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Line starts of reference entries, used to score a heading candidate
+_ENTRY_START = re.compile(r"^[ \t]*(?:\[\d{1,3}\]|\d{1,3}[.)](?!\d)|[A-Z][A-Za-z'\-]+,[ \t]*[A-Z]\.)", re.MULTILINE)
+
+TAIL_WINDOW_CHARS = 20000
+# Text after a heading inspected when scoring it
+SCORE_LOOKAHEAD_CHARS = 3000
+# Entry starts a candidate needs to be accepted without widening the search
+MIN_ENTRY_STARTS = 3
+
+def _score_heading(full_text: str, match: re.Match) -> tuple[float, int]:
+    entries = sum(1 for _ in _ENTRY_START.finditer(full_text, match.end(), match.end() + SCORE_LOOKAHEAD_CHARS))
+    # Later headings win ties: the real section sits at the end of the paper
+    return entries + 2.0 * match.start() / len(full_text), entries
+
+def locate_reference_section(full_text: str) -> tuple[int, int] | None:
+    """
+    (start, end) offsets of the reference list in full_text, or None.
+
+    Scans tail windows backwards from the end of the document, doubling the
+    window until a heading followed by reference-like entries is found, so
+    the cost depends on the length of the reference section rather than the
+    paper. Candidate headings are scored by the entries that follow them and
+    by position; an inline "References" early in the paper loses to the real
+    section at the end. The section ends at a trailing appendix heading, if any.
+    """
+    length = len(full_text)
+    if not length:
+        return None
+    best = None  # (score, match, entry starts)
+    scanned_from = length
+    window = TAIL_WINDOW_CHARS
+    while scanned_from > 0:
+        window_start = max(0, length - window)
+        # Only scan the newly uncovered part, up to the end of the line it cuts into
+        scan_end = full_text.find("\n", scanned_from)
+        for match in _SECTION_HEADING.finditer(full_text, window_start, length if scan_end < 0 else scan_end):
+            score, entries = _score_heading(full_text, match)
+            if best is None or score > best[0]:
+                best = (score, match, entries)
+        scanned_from = window_start
+        if best and best[2] >= MIN_ENTRY_STARTS:
+            break
+        window *= 2
+
+    if best is None:
+        return None
+    start = best[1].end()
+    trailing = _TRAILING_HEADING.search(full_text, start)
+    end = trailing.start() if trailing else length
+    return start, end
@@ -1,8 +1,14 @@
 import requests
 import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from ..core.config import settings
 
-SEMANTIC_SCHOLAR_API_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
+SEMANTIC_SCHOLAR_API_URL = settings.SEMANTIC_SCHOLAR_API_URL
 
 
 def extract_keywords(text: str, max_keywords: int = 8) -> List[str]:
@@ -32,24 +38,59 @@ def extract_keywords(text: str, max_keywords: int = 8) -> List[str]:
     return sorted_keywords[:max_keywords]
 
 
-def recommend_papers(text: str, max_results: int = 5) -> List[Dict]:
+class RecommendationError(Exception):
+    """Raised when Semantic Scholar could not be queried (errors are never cached)."""
+
+class RecommendationService:
     """
-    Given a text, extract keywords and query Semantic Scholar for relevant papers.
-    Returns a list of dicts with title, authors, abstract, url.
+    Semantic Scholar search behind a TTL-bounded LRU keyed by (query, limit).
+    Requests share one keep-alive session, at most `max_concurrency` run at
+    once, and concurrent callers asking for the same query wait on the one
+    request already in flight instead of sending their own (single-flight).
     """
-    keywords = extract_keywords(text)
-    if not keywords:
-        return []
-    query = " ".join(keywords)
-    params = {
-        "query": query,
-        "fields": "title,authors,abstract,url,year",
-        "limit": max_results,
-    }
-    try:
-        resp = requests.get(SEMANTIC_SCHOLAR_API_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+    def __init__(self, api_url: str, timeout: float, ttl: float, max_entries: int, max_concurrency: int):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=0)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        if settings.SEMANTIC_SCHOLAR_API_KEY:
+            self._session.headers["x-api-key"] = settings.SEMANTIC_SCHOLAR_API_KEY
+        self._entries = OrderedDict()  # (query, limit) -> (expires_at, papers)
+        self._inflight = {}  # (query, limit) -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _cached(self, key) -> List[Dict] | None:
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[1]
+        if entry:
+            del self._entries[key]
+        return None
+
+    def _fetch(self, query: str, limit: int) -> List[Dict]:
+        params = {
+            "query": query,
+            "fields": "title,authors,abstract,url,year",
+            "limit": limit,
+        }
+        with self._slots:
+            try:
+                resp = self._session.get(self.api_url, params=params, timeout=self.timeout)
+                resp.raise_for_status()
+                data = resp.json()
+            except (requests.RequestException, ValueError) as e:
+                raise RecommendationError(f"Error querying Semantic Scholar: {e}") from e
         results = []
         for paper in data.get("data", []):
             results.append({
@@ -60,6 +101,69 @@ def recommend_papers(text: str, max_results: int = 5) -> List[Dict]:
                 "year": paper.get("year"),
             })
         return results
-    except Exception as e:
-        print(f"Error querying Semantic Scholar: {e}")
-        return [] 
\ No newline at end of file
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        key = (query, limit)
+        with self._lock:
+            papers = self._cached(key)
+            if papers is not None:
+                self.hits += 1
+                return papers
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            # Raises the leader's RecommendationError if its request failed
+            return flight.result()
+
+        try:
+            papers = self._fetch(query, limit)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                del self._inflight[key]
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, papers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        flight.set_result(papers)
+        return papers
+
+    def recommend(self, text: str, max_results: int = 5) -> List[Dict]:
+        """
+        Papers related to `text`, searched by its extracted keywords. Raises
+        RecommendationError if Semantic Scholar could not be queried.
+        """
+        keywords = extract_keywords(text)
+        if not keywords:
+            return []
+        return self.search(" ".join(keywords), max_results)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+                "entries": len(self._entries),
+                "in_flight": len(self._inflight),
+            }
+
+recommendation_service = RecommendationService(
+    api_url=SEMANTIC_SCHOLAR_API_URL,
+    timeout=settings.RECOMMENDER_TIMEOUT,
+    ttl=settings.RECOMMENDER_CACHE_TTL_SECONDS,
+    max_entries=settings.RECOMMENDER_CACHE_MAX_ENTRIES,
+    max_concurrency=settings.RECOMMENDER_MAX_CONCURRENCY,
+)
@@ -2,16 +2,105 @@
 
 import os
 import json
-from groq import Groq
+import asyncio
+import logging
 from .pdf_parser import split_text_into_chunks
+from .llm_gateway import gateway
 from ..core.config import settings
 
-client = Groq(api_key=settings.GROQ_API_KEY)
+logger = logging.getLogger(__name__)
 
-def generate_structured_summary(full_text: str) -> dict:
+def _use_map_reduce(full_text: str, mode: str = None) -> bool:
+    mode = mode or settings.SUMMARY_MODE
+    if mode == "auto":
+        return len(full_text) > settings.SUMMARY_SINGLE_SHOT_MAX_CHARS
+    return mode == "map_reduce"
+
+async def _summarize_chunk(chunk: str, index: int, total: int) -> str:
+    """
+    Map step: condense one chunk of the paper into notes, labelled by section.
+    """
+    prompt = f"""
+    You are reading part {index + 1} of {total} of a research paper.
+    Write concise notes (at most 150 words) on what this part says, grouped under
+    whichever of these headings apply: Introduction, Methods, Results, Conclusion.
+    Keep concrete numbers, datasets and findings. Do not invent content.
+    Text:
+    \"\"\"
+    {chunk}
+    \"\"\"
+    """
+    content = await gateway.achat(
+        messages=[
+            {"role": "system", "content": "You are a careful note-taker for scientific papers."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=400,
+        temperature=0.2,
+    )
+    return content.strip()
+
+async def _combine_notes(notes: list[str]) -> str:
+    """
+    Intermediate reduce step: merge several consecutive sets of notes into one.
+    """
+    joined = "\n\n---\n\n".join(notes)
+    prompt = f"""
+    Merge these consecutive notes on parts of one research paper into a single set
+    of notes (at most 250 words), keeping the Introduction/Methods/Results/Conclusion
+    headings and the most important concrete details.
+    Notes:
+    \"\"\"
+    {joined}
+    \"\"\"
+    """
+    content = await gateway.achat(
+        messages=[
+            {"role": "system", "content": "You are a careful note-taker for scientific papers."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=600,
+        temperature=0.2,
+    )
+    return content.strip()
+
+async def _map_reduce_notes(chunks: list[str]) -> list[str]:
+    limit = asyncio.Semaphore(settings.SUMMARY_MAX_CONCURRENCY)
+    fan_in = max(2, settings.SUMMARY_REDUCE_FAN_IN)
+
+    async def limited(coro):
+        async with limit:
+            return await coro
+
+    notes = await asyncio.gather(*(limited(_summarize_chunk(chunk, i, len(chunks))) for i, chunk in enumerate(chunks)))
+    while len(notes) > fan_in:
+        groups = [notes[i:i + fan_in] for i in range(0, len(notes), fan_in)]
+        notes = await asyncio.gather(*(limited(_combine_notes(group)) for group in groups))
+    return list(notes)
+
+def summarize_chunks(full_text: str) -> str:
+    """
+    Map-reduce digest of a long paper: chunk it, summarize the chunks concurrently
+    (at most SUMMARY_MAX_CONCURRENCY requests in flight), then merge the chunk notes
+    in groups of SUMMARY_REDUCE_FAN_IN until they fit a single final prompt.
+    """
+    chunks = split_text_into_chunks(full_text, max_chars=settings.SUMMARY_CHUNK_CHARS)
+    notes = gateway.run(_map_reduce_notes(chunks))
+    return "\n\n---\n\n".join(notes)
+
+def generate_structured_summary(full_text: str, mode: str = None, use_cache: bool = True) -> dict:
     """
     Generate a structured summary of a scientific paper using Groq AI.
+
+    Long papers (or mode="map_reduce") are first condensed by summarize_chunks and
+    the final reduce call produces the JSON from those notes. use_cache=False asks
+    the gateway for a fresh sample instead of a cached response.
+    Raises LLMGatewayError when the model cannot be reached and ValueError when
+    it does not answer with JSON, so callers never store a blank summary.
     """
+    if _use_map_reduce(full_text, mode):
+        full_text = summarize_chunks(full_text)
+
     prompt = f"""
     You are a scientific paper summarizer. Given the full text of a research paper,
     return a JSON object with exactly these keys (no extra keys):
@@ -28,38 +117,27 @@ def generate_structured_summary(full_text: str) -> dict:
     \"\"\"
     """
     
+    content = gateway.chat(
+        messages=[
+            {"role": "system", "content": "You are a helpful summarizer."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=1000,
+        temperature=0.2,
+        response_format={"type": "json_object"},
+        use_cache=use_cache,
+    )
     try:
-        response = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",  # e.g., "mixtral-8x7b-32768" or "llama2-70b-4096"
-            messages=[
-                {"role": "system", "content": "You are a helpful summarizer."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.2,
-            response_format={"type": "json_object"}
-        )
-        
-        content = response.choices[0].message.content.strip()
-        
-        try:
-            summary_json = json.loads(content)
-            # Ensure all required keys are present
-            for key in ["introduction", "methods", "results", "conclusion"]:
-                if key not in summary_json:
-                    summary_json[key] = ""
-            return summary_json
-        except json.JSONDecodeError:
-            return {"introduction": "", "methods": "", "results": "", "conclusion": ""}
-            
-    except Exception as e:
-        print(f"Error generating summary with Groq: {e}")
-        return {"introduction": "", "methods": "", "results": "", "conclusion": ""}
-
-def generate_eli5_summary(full_text: str) -> str:
-    """
-    Generate an ELI5 (Explain Like I'm 5) summary of a scientific paper using Groq AI.
-    """
+        summary_json = json.loads(content.strip())
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Summary response is not valid JSON: {e}") from e
+    # Ensure all required keys are present
+    for key in ["introduction", "methods", "results", "conclusion"]:
+        if key not in summary_json:
+            summary_json[key] = ""
+    return summary_json
+
+def _eli5_messages(full_text: str) -> list[dict]:
     prompt = f"""
     You are an expert at explaining complex scientific concepts in simple terms that a 5-year-old could understand.
     
@@ -78,20 +156,34 @@ def generate_eli5_summary(full_text: str) -> str:
     {full_text}
     \"\"\"
     """
-    
-    try:
-        response = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=[
-                {"role": "system", "content": "You are an expert at explaining complex topics in simple terms."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.3,
-        )
-        
-        return response.choices[0].message.content.strip()
-            
-    except Exception as e:
-        print(f"Error generating ELI5 summary with Groq: {e}")
-        return "Sorry, I couldn't create a simple explanation right now. Please try again later."
\ No newline at end of file
+    return [
+        {"role": "system", "content": "You are an expert at explaining complex topics in simple terms."},
+        {"role": "user", "content": prompt}
+    ]
+
+def generate_eli5_summary(full_text: str, mode: str = None, use_cache: bool = True) -> str:
+    """
+    Generate an ELI5 (Explain Like I'm 5) summary of a scientific paper using Groq AI.
+    Long papers are condensed with summarize_chunks first, like generate_structured_summary.
+    Errors (LLMGatewayError) are raised to the caller.
+    """
+    if _use_map_reduce(full_text, mode):
+        full_text = summarize_chunks(full_text)
+
+    content = gateway.chat(
+        messages=_eli5_messages(full_text),
+        max_tokens=500,
+        temperature=0.3,
+        use_cache=use_cache,
+    )
+    return content.strip()
+
+async def stream_eli5_summary(full_text: str, mode: str = None, use_cache: bool = True):
+    """
+    Streaming variant of generate_eli5_summary: yields the explanation piece by
+    piece as the model writes it. Errors are raised to the caller.
+    """
+    if _use_map_reduce(full_text, mode):
+        full_text = await asyncio.to_thread(summarize_chunks, full_text)
+    async for piece in gateway.astream(_eli5_messages(full_text), max_tokens=500, temperature=0.3, use_cache=use_cache):
+        yield piece
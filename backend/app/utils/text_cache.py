@@ -0,0 +1,90 @@
+# app/utils/text_cache.py
+
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import logging
+from dataclasses import asdict
+from .ocr import OCR_TIERS
+from .pdf_parser import extract_pages_from_pdf
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def extraction_variant() -> str:
+    """
+    Short hash of the settings that change extracted text: the OCR mode and the
+    parameters of its tier. Part of every cache key, so switching OCR_MODE (or
+    retuning a tier) misses instead of serving text OCR'd the old way.
+    """
+    mode = settings.OCR_MODE
+    params = {"version": CACHE_FORMAT_VERSION, "mode": mode, "tier": asdict(OCR_TIERS[mode])}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+def _cache_path(sha256: str, variant: str) -> str:
+    return os.path.join(settings.TEXT_CACHE_DIR, sha256[:2], f"{sha256}.{variant}.json.gz")
+
+def load_extraction(sha256: str) -> list[dict] | None:
+    """
+    Return the cached per-page extraction for a file hash under the current OCR
+    settings, or None on a miss.
+    """
+    variant = extraction_variant()
+    try:
+        with gzip.open(_cache_path(sha256, variant), "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable text cache entry {sha256}: {e}")
+        return None
+    if payload.get("version") != CACHE_FORMAT_VERSION or payload.get("variant") != variant:
+        return None
+    return payload["pages"]
+
+def save_extraction(sha256: str, pages: list[dict]):
+    """
+    Store a per-page extraction. The file is written next to its final name and
+    renamed into place, so concurrent readers never see a partial entry.
+    """
+    variant = extraction_variant()
+    path = _cache_path(sha256, variant)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps({"version": CACHE_FORMAT_VERSION, "variant": variant, "sha256": sha256, "pages": pages}).encode("utf-8"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def get_document_pages(pdf_path: str, sha256: str = None) -> list[dict]:
+    """
+    Per-page text of a PDF, read through the content-addressed cache. The PDF is
+    only parsed (and OCR'd) the first time a given file content is seen.
+    """
+    sha256 = sha256 or file_sha256(pdf_path)
+    pages = load_extraction(sha256)
+    if pages is not None:
+        return pages
+    pages = extract_pages_from_pdf(pdf_path)
+    save_extraction(sha256, pages)
+    return pages
+
+def get_document_text(pdf_path: str, sha256: str = None) -> str:
+    """
+    Cached equivalent of extract_text_from_pdf.
+    """
+    return "\n".join(page["text"] for page in get_document_pages(pdf_path, sha256=sha256))
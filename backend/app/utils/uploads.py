@@ -0,0 +1,136 @@
+# app/utils/uploads.py
+
+import os
+import hashlib
+from dataclasses import dataclass
+from fastapi import UploadFile
+from ..core.config import settings
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+PDF_MAGIC = b"%PDF-"
+# Readers accept the PDF header anywhere in the first 1024 bytes
+PDF_MAGIC_WINDOW = 1024
+# Allowance for multipart boundaries and form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+@dataclass
+class StoredUpload:
+    path: str
+    sha256: str
+    size: int
+
+def max_upload_bytes() -> int:
+    return settings.MAX_UPLOAD_MB * 1024 * 1024
+
+def copy_upload_to_disk(src, dest_path: str, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> StoredUpload:
+    """
+    Copy a file object to dest_path in fixed-size chunks, hashing as it goes.
+    Raises UploadRejected (and removes the partial file) if the data does not
+    start like a PDF or grows past max_bytes.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        with open(dest_path, "wb") as out:
+            while chunk := src.read(chunk_size):
+                if len(head) < PDF_MAGIC_WINDOW:
+                    head += chunk[:PDF_MAGIC_WINDOW - len(head)]
+                    if PDF_MAGIC not in head and len(head) >= PDF_MAGIC_WINDOW:
+                        raise UploadRejected(415, "Only PDF files are accepted.")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(413, f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+                sha256.update(chunk)
+                out.write(chunk)
+        if PDF_MAGIC not in head:
+            raise UploadRejected(415, "Only PDF files are accepted.")
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return StoredUpload(path=dest_path, sha256=sha256.hexdigest(), size=size)
+
+def save_upload(file: UploadFile, dest_path: str, max_bytes: int = None) -> StoredUpload:
+    """
+    Stream an UploadFile to disk so memory use does not depend on the size of
+    the file. Blocking: call it from a sync route, which runs on the threadpool.
+    """
+    max_bytes = max_upload_bytes() if max_bytes is None else max_bytes
+    # Starlette records the size while spooling the part; refuse before copying
+    if file.size is not None and file.size > max_bytes:
+        raise UploadRejected(413, f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+    file.file.seek(0)
+    return copy_upload_to_disk(file.file, dest_path, max_bytes)
+
+class _BodyTooLarge(Exception):
+    pass
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps POST/PUT request bodies at the upload limit (plus multipart overhead)
+    with a 413. A declared Content-Length over the limit is refused before any
+    of the body is read; bodies without one (chunked) are counted as they are
+    received, and the read is cut off as soon as the count passes the limit.
+    This matters because Starlette spools a multipart file part to a temporary
+    file before the route sees it, so a check in the route comes too late.
+    """
+    def __init__(self, app, max_bytes: int = None):
+        self.app = app
+        self.max_bytes = (max_upload_bytes() if max_bytes is None else max_bytes) + MULTIPART_OVERHEAD
+
+    @staticmethod
+    async def _reject(send):
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": b'{"detail":"Request body too large."}'})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._reject(send)
+                return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if exceeded:
+                # FastAPI answers a failed body read with a 400; send the 413 instead
+                if not started:
+                    started = True
+                    await self._reject(send)
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not started:
+                await self._reject(send)
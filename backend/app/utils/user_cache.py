@@ -0,0 +1,101 @@
+# app/utils/user_cache.py
+
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from sqlalchemy import event
+from ..core.config import settings
+from ..models.user import User
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Detached, read-only copy of the User columns routes read from current_user.
+    """
+    id: int
+    email: str
+    full_name: str | None
+    is_active: bool
+    token_version: int
+    zotero_api_key: str | None
+    zotero_user_id: str | None
+
+    @classmethod
+    def from_model(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            token_version=user.token_version or 0,
+            zotero_api_key=user.zotero_api_key,
+            zotero_user_id=user.zotero_user_id,
+        )
+
+class UserCache:
+    """
+    TTL-bounded LRU of authenticated users keyed by (user id, token version),
+    so get_current_user only queries the database on a miss. Entries are
+    dropped when the User row is updated or deleted through this process's
+    ORM; other processes see the change within `ttl` seconds.
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (user_id, token_version) -> (expires_at, CachedUser)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int, token_version: int) -> CachedUser | None:
+        key = (user_id, token_version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, user: CachedUser):
+        key = (user.id, user.token_version)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+            }
+
+user_cache = UserCache(ttl=settings.USER_CACHE_TTL_SECONDS, max_entries=settings.USER_CACHE_MAX_ENTRIES)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
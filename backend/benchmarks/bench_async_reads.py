@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Read throughput of the async routes against the previous sync handlers at
+200 concurrent clients. The sync handlers (get_db + the sync crud functions,
+run on Starlette's threadpool) are mounted under /sync for the run; the
+async ones are the app's own. Each client loops over GET /documents/{id}/full
+and GET /documents/?limit=20 through httpx's ASGI transport, in-process.
+
+The gap is widest on PostgreSQL, where every query waits on the network and
+a sync handler holds a threadpool thread for that whole wait; on a local
+SQLite file queries are mostly CPU and the two are closer.
+
+Run from backend/ (a scratch SQLite file is used unless --database-url is given):
+    python -m benchmarks.bench_async_reads [--clients 200] [--seconds 10]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--citations", type=int, default=20, help="citations per document")
+    parser.add_argument("--database-url", default="sqlite:///bench_reads.sqlite3")
+    return parser.parse_args()
+
+ARGS = parse_args()
+# app.database builds its engines from DATABASE_URL at import time
+os.environ["DATABASE_URL"] = ARGS.database_url
+
+import httpx  # noqa: E402
+from fastapi import APIRouter, Depends, HTTPException  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.main import app  # noqa: E402
+from app.database import Base, SessionLocal, async_engine, engine, get_db  # noqa: E402
+from app.core.db_pool import pool_metrics  # noqa: E402
+from app.api.dependencies import create_access_token, get_current_user  # noqa: E402
+from app.crud import document as crud_doc  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.document import Document, DocumentStatus  # noqa: E402
+from app.models.summary import Summary  # noqa: E402
+from app.models.citation import Citation  # noqa: E402
+from app.schemas.document import DocumentFull, DocumentRead  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# The handlers as they were before the async session: sync def, so each
+# request takes a threadpool thread for as long as its queries run
+sync_router = APIRouter(prefix="/sync/documents")
+
+@sync_router.get("/{document_id}/full", response_model=DocumentFull)
+def sync_document_full(document_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    db_doc = crud_doc.get_document_full(db, document_id)
+    if not db_doc or db_doc.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Document not found.")
+    return db_doc
+
+@sync_router.get("/", response_model=list[DocumentRead])
+def sync_documents(limit: int = 20, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    rows, _ = crud_doc.list_documents_page(db, owner_id=current_user.id, limit=limit)
+    return rows
+
+app.include_router(sync_router)
+
+def seed() -> tuple[str, list[int]]:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "bench-reads@example.com").first()
+        if not user:
+            user = User(email="bench-reads@example.com", full_name="Read Benchmark")
+            db.add(user)
+            db.commit()
+        old_ids = [row.id for row in db.query(Document.id).filter(Document.owner_id == user.id)]
+        if old_ids:
+            db.execute(delete(Citation).where(Citation.document_id.in_(old_ids)))
+            db.execute(delete(Summary).where(Summary.document_id.in_(old_ids)))
+            db.execute(delete(Document).where(Document.id.in_(old_ids)))
+        document_ids = []
+        for i in range(ARGS.documents):
+            doc = Document(
+                owner_id=user.id,
+                file_path=f"/uploads/{user.id}/{i}.pdf",
+                original_filename=f"paper-{i}.pdf",
+                status=DocumentStatus.COMPLETED,
+                progress=100,
+            )
+            db.add(doc)
+            db.flush()
+            document_ids.append(doc.id)
+            db.add(Summary(document_id=doc.id, introduction="Intro " * 80, methods="Methods " * 80,
+                           results="Results " * 80, conclusion="Conclusion " * 40))
+            if ARGS.citations:
+                db.execute(insert(Citation), [
+                    {"document_id": doc.id, "raw_bibtex": f"@article{{c{j}, title={{Paper {j}}}}}",
+                     "title": f"Paper {j}", "authors": "Doe, J.", "year": "2020"}
+                    for j in range(ARGS.citations)
+                ])
+        db.commit()
+        token = create_access_token({"sub": str(user.id), "ver": user.token_version or 0})
+        return token, document_ids
+    finally:
+        db.close()
+
+async def client_loop(client: httpx.AsyncClient, prefix: str, document_ids: list[int], offset: int,
+                      deadline: float, latencies: list[float], errors: list[str]):
+    i = offset
+    while time.perf_counter() < deadline:
+        if i % 2:
+            path = f"{prefix}/{document_ids[i % len(document_ids)]}/full"
+        else:
+            path = f"{prefix}/?limit=20"
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            response.raise_for_status()
+        except Exception as e:
+            # e.g. QueuePool checkout timeouts once every thread waits on a connection
+            errors.append(type(e).__name__)
+        else:
+            latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+async def run(client: httpx.AsyncClient, label: str, prefix: str, document_ids: list[int]):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + ARGS.seconds
+    await asyncio.gather(*(
+        client_loop(client, prefix, document_ids, n, deadline, latencies, errors) for n in range(ARGS.clients)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)] if latencies else float("nan")
+    print(f"{label:<6} {len(latencies) / elapsed:8.1f} req/s  p50 {p50:8.1f} ms  p99 {p99:8.1f} ms  "
+          f"({len(latencies)} ok, {len(errors)} failed, {elapsed:.1f}s)")
+    pool = pool_metrics[label].stats()
+    print(f"       pool: peak in use {pool['peak_in_use']}, checkout wait p95 {pool['wait_ms']['p95']:.1f} ms "
+          f"max {pool['wait_ms']['max']:.1f} ms, {pool['timeouts']} timeouts")
+
+async def main():
+    print(f"Seeding {ARGS.documents} documents into {ARGS.database_url} ...", file=sys.stderr)
+    token, document_ids = seed()
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=None) as client:
+        # Warm both pools and the user cache before timing
+        await client.get("/sync/documents/?limit=1")
+        await client.get("/documents/?limit=1")
+        print(f"{ARGS.clients} clients, {ARGS.seconds:g}s each")
+        await run(client, "sync", "/sync/documents", document_ids)
+        await run(client, "async", "/documents", document_ids)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of get_current_user with and without the user cache: JWT
+decode plus either a cache lookup or a SELECT on users.
+
+Run from backend/ (a scratch SQLite file is used unless --database-url is given):
+    python -m benchmarks.bench_auth_overhead [--requests 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--database-url", default="sqlite:///bench_auth.sqlite3")
+    return parser.parse_args()
+
+ARGS = parse_args()
+# app.database builds its engine from DATABASE_URL at import time
+os.environ["DATABASE_URL"] = ARGS.database_url
+
+from app.database import Base, SessionLocal, AsyncSessionLocal, async_engine, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models import document, summary, citation  # noqa: E402,F401  (register mappers)
+from app.api.dependencies import get_current_user, create_access_token  # noqa: E402
+from app.utils.user_cache import user_cache  # noqa: E402
+
+async def run(token: str, cached: bool) -> list[float]:
+    timings = []
+    for _ in range(ARGS.requests):
+        if not cached:
+            user_cache.clear()
+        # A fresh session per request, as the get_async_db dependency gives
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await get_current_user(token=token, db=db)
+            timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+def report(label: str, timings: list[float]):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{label:<10} mean {statistics.fmean(timings):8.1f} us   p50 {timings[len(timings) // 2]:8.1f} us   p99 {p99:8.1f} us")
+
+async def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = db.query(User).filter(User.email == "bench-auth@example.com").first()
+    if not user:
+        user = User(email="bench-auth@example.com", full_name="Auth Benchmark")
+        db.add(user)
+        db.commit()
+    token = create_access_token({"sub": str(user.id), "ver": user.token_version or 0})
+    db.close()
+
+    report("no cache", await run(token, cached=False))
+    user_cache.clear()
+    report("cached", await run(token, cached=True))
+    print(f"cache stats: {user_cache.stats()}")
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Document listing at scale: the old full load (get_documents_by_owner) against
+keyset pages (list_documents_page) for one owner with 100k documents, plus
+OFFSET paging for reference.
+
+Run from backend/ against a scratch database (tables are created, and the
+documents for the benchmark owner are replaced):
+    python -m benchmarks.bench_document_listing [--documents 100000] [--database-url sqlite:///bench_listing.sqlite3]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--database-url", default="sqlite:///bench_listing.sqlite3")
+    return parser.parse_args()
+
+ARGS = parse_args()
+# app.database builds its engine from DATABASE_URL at import time
+os.environ["DATABASE_URL"] = ARGS.database_url
+
+from sqlalchemy import delete, insert  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.document import Document, DocumentStatus  # noqa: E402
+from app.models import summary, citation  # noqa: E402,F401  (register mappers)
+from app.crud import document as crud_doc  # noqa: E402
+
+STATUSES = [DocumentStatus.COMPLETED] * 8 + [DocumentStatus.FAILED, DocumentStatus.PROCESSING]
+
+def seed(db, count: int) -> int:
+    user = db.query(User).filter(User.email == "bench-listing@example.com").first()
+    if not user:
+        user = User(email="bench-listing@example.com", full_name="Listing Benchmark")
+        db.add(user)
+        db.commit()
+    db.execute(delete(Document).where(Document.owner_id == user.id))
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    batch = []
+    for i in range(count):
+        batch.append({
+            "owner_id": user.id,
+            "file_path": f"/uploads/{user.id}/{i}.pdf",
+            "original_filename": f"paper-{i}.pdf",
+            "status": STATUSES[i % len(STATUSES)],
+            "progress": 100,
+            # Several documents share a timestamp, as bulk uploads do
+            "created_at": start + timedelta(seconds=i // 3),
+        })
+        if len(batch) == 10_000:
+            db.execute(insert(Document), batch)
+            batch = []
+    if batch:
+        db.execute(insert(Document), batch)
+    db.commit()
+    return user.id
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Seeding {ARGS.documents} documents into {ARGS.database_url} ...", file=sys.stderr)
+        owner_id = seed(db, ARGS.documents)
+        size = ARGS.page_size
+
+        ms, docs = timed(lambda: crud_doc.get_documents_by_owner(db, owner_id))
+        print(f"full ORM load (old GET /documents/): {ms:9.1f} ms  {len(docs)} rows")
+        db.expunge_all()
+
+        ms, (rows, cursor) = timed(lambda: crud_doc.list_documents_page(db, owner_id, limit=size))
+        print(f"keyset first page:                   {ms:9.1f} ms  {len(rows)} rows")
+
+        # Walk to ~90% depth with cursors, then time one deep page
+        pages = int(ARGS.documents * 0.9) // size
+        walk_start = time.perf_counter()
+        for _ in range(pages - 1):
+            rows, cursor = crud_doc.list_documents_page(db, owner_id, limit=size, cursor=cursor)
+        walk_ms = (time.perf_counter() - walk_start) * 1000
+        ms, (rows, _) = timed(lambda: crud_doc.list_documents_page(db, owner_id, limit=size, cursor=cursor))
+        print(f"keyset page {pages + 1} (deep):             {ms:9.1f} ms  {len(rows)} rows  "
+              f"(walk of {pages - 1} pages: {walk_ms / max(1, pages - 1):.2f} ms/page)")
+
+        ms, rows = timed(lambda: (
+            db.query(*crud_doc.DOCUMENT_LIST_COLUMNS)
+            .filter(Document.owner_id == owner_id)
+            .order_by(Document.created_at.desc(), Document.id.desc())
+            .offset(pages * size).limit(size).all()
+        ))
+        print(f"OFFSET page {pages + 1} (deep):             {ms:9.1f} ms  {len(rows)} rows")
+
+        ms, (rows, _) = timed(lambda: crud_doc.list_documents_page(
+            db, owner_id, limit=size, statuses=[DocumentStatus.FAILED, DocumentStatus.PROCESSING]
+        ))
+        print(f"keyset first page, status filter:    {ms:9.1f} ms  {len(rows)} rows")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Pages/sec of PDF text extraction as the worker count grows.
+
+Run from backend/:
+    python -m benchmarks.bench_pdf_extraction [--pages 400] [path/to/paper.pdf]
+
+Without a path a synthetic text-only PDF is generated, so OCR is not exercised.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import fitz
+
+from app.utils.pdf_parser import extract_text_from_pdf, extract_text_from_pdf_parallel
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+    "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. "
+)
+
+def make_pdf(path: str, pages: int):
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Page {page_num + 1}\n" + LOREM * 25, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--pages", type=int, default=400)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    pdf_path = args.pdf
+    if not pdf_path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        pdf_path = os.path.join(tmp_dir.name, "bench.pdf")
+        make_pdf(pdf_path, args.pages)
+
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+
+    baseline, elapsed = timed(extract_text_from_pdf, pdf_path, workers=1)
+    print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    print(f"{'serial':>8} {elapsed:9.3f} {page_count / elapsed:9.1f} {1.0:8.2f}")
+
+    worker_counts = [w for w in (1, 2, 4, 8, 16) if w <= (os.cpu_count() or 1)]
+    for workers in worker_counts:
+        text, seconds = timed(extract_text_from_pdf_parallel, pdf_path, workers=workers)
+        if text != baseline:
+            print(f"output mismatch with {workers} workers", file=sys.stderr)
+        print(f"{workers:>8} {seconds:9.3f} {page_count / seconds:9.1f} {elapsed / seconds:8.2f}")
+
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Recommendation lookups against a local fake Semantic Scholar: the previous
+per-call requests.get against RecommendationService (keep-alive session, TTL
+cache, single-flight). A burst of concurrent requests for the same document
+is followed by repeat visits to a handful of documents, as a dashboard
+refresh would produce.
+
+Run from backend/:
+    python -m benchmarks.bench_recommendations [--burst 50] [--latency-ms 300]
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from app.utils.research_paper_recommender import RecommendationService, extract_keywords
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--burst", type=int, default=50, help="concurrent requests for one document")
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--visits", type=int, default=100, help="sequential requests spread over the documents")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    return parser.parse_args()
+
+class FakeSemanticScholar:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(fake.latency)
+                with fake.lock:
+                    fake.requests += 1
+                body = json.dumps({"data": [
+                    {"title": f"Related paper {i}", "authors": [{"name": "Jane Doe"}], "abstract": "", "url": None, "year": 2020}
+                    for i in range(5)
+                ]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/graph/v1/paper/search"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def old_recommend(url: str, text: str) -> list:
+    # The original recommender: a new connection and request every call
+    params = {"query": " ".join(extract_keywords(text)), "fields": "title,authors,abstract,url,year", "limit": 5}
+    resp = requests.get(url, params=params, timeout=10)
+    resp.raise_for_status()
+    return resp.json().get("data", [])
+
+def workload(recommend, texts: list[str], args) -> tuple[float, float]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.burst) as pool:
+        list(pool.map(lambda _: recommend(texts[0]), range(args.burst)))
+    burst = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(args.visits):
+        recommend(texts[i % len(texts)])
+    return burst, time.perf_counter() - start
+
+def main():
+    args = parse_args()
+    texts = [f"transformer attention mechanisms for protein folding study{i} experiments evaluation" for i in range(args.documents)]
+    for label, make in (
+        ("requests.get per call", lambda url: lambda text: old_recommend(url, text)),
+        ("RecommendationService", lambda url: RecommendationService(url, timeout=10, ttl=3600, max_entries=128, max_concurrency=4).recommend),
+    ):
+        fake = FakeSemanticScholar(args.latency_ms)
+        try:
+            burst, visits = workload(make(fake.url), texts, args)
+        finally:
+            fake.stop()
+        print(f"{label:<22} burst of {args.burst}: {burst:6.2f} s   {args.visits} visits: {visits:6.2f} s   "
+              f"upstream requests {fake.requests:4}  connections {fake.connections:4}")
+
+if __name__ == "__main__":
+    main()
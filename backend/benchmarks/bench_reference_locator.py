@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Reference-section lookup time as papers grow, tail-first locator against the
+previous heading scan. Papers come in two variants: "plain", and "toc", which
+also has "References" on a line of its own early in the body, as tables of
+contents and OCR'd running headers do, before the real section at the end.
+
+Run from backend/:
+    python -m benchmarks.bench_reference_locator [--repeat 5]
+"""
+
+import argparse
+import re
+import time
+
+from app.utils import reference_parser
+
+OLD_PATTERNS = [
+    r"\n\s*(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*\n",
+    r"\n\s*(REFERENCES?|BIBLIOGRAPHY|LITERATURE CITED|WORKS CITED|SOURCES?)\s*\n",
+    r"\n\s*(\d+\.\s*)?(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*\n",
+    r"\n\s*(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*$",
+    r"^\s*(References?|Bibliography|Literature Cited|Works Cited|Sources?)\s*\n",
+]
+
+def old_locate(full_text: str) -> str:
+    # The heading scan extract_reference_section used before the locator
+    for pattern in OLD_PATTERNS:
+        for match in re.finditer(pattern, full_text, re.IGNORECASE | re.MULTILINE):
+            ref_text = full_text[match.end():].strip()
+            if ref_text and len(ref_text) > 50:
+                return ref_text
+    return ""
+
+def new_locate(full_text: str) -> str:
+    span = reference_parser.locate_reference_section(full_text)
+    return full_text[span[0]:span[1]].strip() if span else ""
+
+def make_paper(body_pages: int, toc: bool, references: int = 60) -> str:
+    page = "\n".join(f"Body sentence {i} discussing prior work and experimental results at length." for i in range(40))
+    body = [page] * body_pages
+    if toc:
+        body.insert(1, "Contents\nIntroduction\nMethods\nReferences\n" + page)
+    refs = "\n".join(f"[{i}] Smith, J. ({2000 + i % 20}). Paper {i}. Journal, {i}, {i}-{i + 5}." for i in range(1, references + 1))
+    return "\n".join(body) + "\nReferences\n" + refs
+
+def best_of(fn, text: str, repeat: int) -> tuple[float, str]:
+    best, result = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'variant':>7} {'pages':>6} {'chars':>10} {'old ms':>8} {'new ms':>8} {'old found real':>15} {'new found real':>15}")
+    for toc in (False, True):
+        for pages in (10, 50, 200, 1000):
+            paper = make_paper(pages, toc)
+            real = paper[paper.rindex("References\n") + len("References\n"):].strip()
+            old_s, old = best_of(old_locate, paper, args.repeat)
+            new_s, new = best_of(new_locate, paper, args.repeat)
+            print(f"{'toc' if toc else 'plain':>7} {pages:>6} {len(paper):>10} {old_s * 1000:>8.2f} {new_s * 1000:>8.2f} "
+                  f"{str(old == real):>15} {str(new == real):>15}")
+
+if __name__ == "__main__":
+    main()
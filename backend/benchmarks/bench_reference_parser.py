@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Speed and output of the precompiled reference parser against the previous
+regex fallback (_extract_citations_with_regex / _convert_line_to_bibtex) on a
+synthetic corpus of reference sections in the common list styles.
+
+Run from backend/:
+    python -m benchmarks.bench_reference_parser [--references 200] [--repeat 5]
+"""
+
+import argparse
+import re
+import time
+
+from app.utils import citation_extractor, reference_parser
+
+AUTHORS = ["Smith, J.", "Garcia, M.", "Chen, L.", "Okafor, N.", "Ivanova, E.", "Tanaka, H."]
+
+def _reference(i: int) -> str:
+    author = AUTHORS[i % len(AUTHORS)]
+    if i % 3 == 0:
+        coauthor = AUTHORS[(i + 1) % len(AUTHORS)]
+        return f"{author} & {coauthor} ({1990 + i % 35}). Joint study {i} of sparse systems. Journal of Examples, {i % 40 + 1}({i % 4 + 1}), {i}-{i + 12}."
+    if i % 3 == 1:
+        return f"{author} ({1990 + i % 35}). Methods for problem {i}. Example Press."
+    return f"{author} ({1990 + i % 35}). Results on case {i}. Annals of Tests, {i % 30 + 1}, {i}-{i + 7}."
+
+def make_corpus(count: int) -> dict[str, str]:
+    refs = [_reference(i) for i in range(1, count + 1)]
+    return {
+        "numbered": "\n".join(f"{i}. {ref}" for i, ref in enumerate(refs, 1)),
+        "bracketed": "\n".join(f"[{i}] {ref}" for i, ref in enumerate(refs, 1)),
+        "author-year": "\n".join(refs),
+        "bulleted": "\n".join(f"• {ref}" for ref in refs),
+        "blank-separated": "\n\n".join(refs),
+        # IEEE style has no author-year shape: both fall through every strategy
+        "ieee (no match)": "\n".join(
+            f"[{i}] J. Smith and M. Garcia, \"Approach {i} to sparse systems,\" in Proc. Example Conf., {1990 + i % 35}, pp. {i}-{i + 9}."
+            for i in range(1, count + 1)
+        ),
+    }
+
+def old_diagnostic(text: str) -> int:
+    # The inline scan process_document used to run when no section was found
+    for pattern in (
+        r'\n\s*\d+\.\s*[A-Z][^.]*\.\s*\d{4}',
+        r'\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\d{4}',
+        r'\n\s*[A-Z][a-z]+,\s*[A-Z]\.\s*\([^)]*\)',
+    ):
+        matches = re.findall(pattern, text)
+        if matches:
+            return len(matches)
+    return 0
+
+def best_of(fn, text: str, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--references", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.references)
+    print(f"{'style':<16} {'old ms':>8} {'new ms':>8} {'speedup':>8} {'old n':>6} {'new n':>6} {'same':>6}")
+    for style, text in corpus.items():
+        old_s, old = best_of(citation_extractor._extract_citations_with_regex, text, args.repeat)
+        new_s, new = best_of(reference_parser.parse_references, text, args.repeat)
+        same = len(set(old) & set(new))
+        print(f"{style:<16} {old_s * 1000:>8.2f} {new_s * 1000:>8.2f} {old_s / new_s:>7.1f}x "
+              f"{len(old):>6} {len(new):>6} {same:>6}")
+
+    paper = "Body text without a references heading.\n" * 2000 + "\n" + corpus["author-year"]
+    old_s, old = best_of(old_diagnostic, paper, args.repeat)
+    new_s, new = best_of(reference_parser.count_citation_lines, paper, args.repeat)
+    print(f"{'diagnostic scan':<16} {old_s * 1000:>8.2f} {new_s * 1000:>8.2f} {old_s / new_s:>7.1f}x {old:>6} {new:>6}")
+    print(f"(expected {args.references} citations per author-year style; 'same' counts byte-identical BibTeX entries)")
+
+if __name__ == "__main__":
+    main()
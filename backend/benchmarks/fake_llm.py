@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint (what the
+Groq client calls: POST .../openai/v1/chat/completions), for exercising the
+LLM gateway without a provider. It answers plain and streamed completions,
+returns a filled-in JSON object when response_format asks for one, and can
+add latency, fail the first requests with given status codes (429s carry
+Retry-After) or rate-limit every Nth request. It records how many requests
+were in flight at once, so the gateway's concurrency cap can be checked.
+
+Standalone:
+    python -m benchmarks.fake_llm [--port 8124] [--latency-ms 200] [--rate-limit-every 10]
+then set LLM_BASE_URL=http://127.0.0.1:8124 (and any GROQ_API_KEY).
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUMMARY_KEYS = ("introduction", "methods", "results", "conclusion")
+
+class FakeLLM:
+    def __init__(self, port: int = 0, latency_ms: float = 50, errors: list[int] = (), retry_after: float = 1,
+                 rate_limit_every: int = 0, stream_chunks: int = 5):
+        self.latency = latency_ms / 1000
+        self.errors = list(errors)
+        self.retry_after = retry_after
+        self.rate_limit_every = rate_limit_every
+        self.stream_chunks = stream_chunks
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.statuses = []
+        self.request_times = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _next_status(self) -> int:
+        with self.lock:
+            self.requests += 1
+            self.request_times.append(time.monotonic())
+            if self.errors:
+                status = self.errors.pop(0)
+            elif self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+                status = 429
+            else:
+                status = 200
+            self.statuses.append(status)
+            return status
+
+    @staticmethod
+    def _content(body: dict) -> str:
+        prompt = body["messages"][-1]["content"] if body.get("messages") else ""
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            return json.dumps({key: f"Fake {key} summary." for key in SUMMARY_KEYS})
+        return f"Fake completion for a {len(prompt)}-character prompt."
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: dict, headers: dict = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, completion_id: str, model: str, content: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                size = max(1, -(-len(content) // fake.stream_chunks))
+                for i in range(0, len(content), size):
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                             "choices": [{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake.lock:
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    status = fake._next_status()
+                    time.sleep(fake.latency)
+                    if not self.path.endswith("/chat/completions"):
+                        return self._reply(404, {"error": {"message": "Unknown path"}})
+                    if status == 429:
+                        return self._reply(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                                           {"Retry-After": str(fake.retry_after)})
+                    if status != 200:
+                        return self._reply(status, {"error": {"message": f"Fake error {status}", "type": "server_error"}})
+                    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                    model = body.get("model", "fake")
+                    content = fake._content(body)
+                    if body.get("stream"):
+                        return self._stream(completion_id, model, content)
+                    self._reply(200, {
+                        "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    })
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+
+        return Handler
+
+    def start(self) -> "FakeLLM":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8124)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--retry-after", type=float, default=1)
+    args = parser.parse_args()
+    fake = FakeLLM(args.port, args.latency_ms, retry_after=args.retry_after, rate_limit_every=args.rate_limit_every)
+    print(f"Fake LLM API on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        fake.server.server_close()
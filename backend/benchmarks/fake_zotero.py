@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Zotero write API (POST /users/{id}/items), for trying
+the exporter without a real library. It answers in Zotero's per-item format,
+enforces the 50-item limit and write tokens, and can add latency, a per
+connection setup cost (standing in for the TLS handshake), Backoff headers
+and 429 + Retry-After responses.
+
+Standalone:
+    python -m benchmarks.fake_zotero [--port 8123] [--latency-ms 40] [--rate-limit-every 10]
+then set ZOTERO_API_URL=http://127.0.0.1:8123.
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class FakeZotero:
+    def __init__(self, port: int = 0, latency_ms: float = 40, connect_ms: float = 60,
+                 rate_limit_every: int = 0, retry_after: float = 1, backoff_every: int = 0, backoff: float = 1):
+        self.latency = latency_ms / 1000
+        self.connect = connect_ms / 1000
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.backoff_every = backoff_every
+        self.backoff = backoff
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.items_created = 0
+        self.rate_limited = 0
+        self.write_tokens = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+                time.sleep(fake.connect)
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body=None, headers: dict = None):
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                items = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"[]")
+                time.sleep(fake.latency)
+                with fake.lock:
+                    fake.requests += 1
+                    n = fake.requests
+                if not self.path.endswith("/items") or not self.headers.get("Zotero-API-Key"):
+                    return self._reply(403, {"message": "Forbidden"})
+                if fake.rate_limit_every and n % fake.rate_limit_every == 0:
+                    with fake.lock:
+                        fake.rate_limited += 1
+                    return self._reply(429, {"message": "Too many requests"}, {"Retry-After": str(fake.retry_after)})
+                if len(items) > 50:
+                    return self._reply(413, {"message": "Too many items"})
+                token = self.headers.get("Zotero-Write-Token")
+                with fake.lock:
+                    if token in fake.write_tokens:
+                        return self._reply(412, {"message": "Write token already used"})
+                    if token:
+                        fake.write_tokens.add(token)
+                successful, success, failed = {}, {}, {}
+                for i, item in enumerate(items):
+                    if not isinstance(item, dict) or "itemType" not in item:
+                        failed[str(i)] = {"key": None, "code": 400, "message": "'itemType' property not provided"}
+                        continue
+                    key = uuid.uuid4().hex[:8].upper()
+                    successful[str(i)] = {"key": key, "version": 1, "data": item}
+                    success[str(i)] = key
+                with fake.lock:
+                    fake.items_created += len(successful)
+                headers = {}
+                if fake.backoff_every and n % fake.backoff_every == 0:
+                    headers["Backoff"] = str(fake.backoff)
+                self._reply(200, {"successful": successful, "success": success, "unchanged": {}, "failed": failed}, headers)
+
+        return Handler
+
+    def start(self) -> "FakeZotero":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--connect-ms", type=float, default=60)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--backoff-every", type=int, default=0)
+    args = parser.parse_args()
+    fake = FakeZotero(args.port, args.latency_ms, args.connect_ms, args.rate_limit_every, backoff_every=args.backoff_every)
+    print(f"Fake Zotero API on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        fake.server.server_close()
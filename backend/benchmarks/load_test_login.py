@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Latency of other routes during a login burst. The app is driven in-process
+through httpx's ASGI transport, so everything shares one event loop the way
+a uvicorn worker does. A poller hits GET / while logins run, and the poll
+latencies are reported for three phases:
+  idle     - no logins
+  inline   - bcrypt verified on the event loop (the previous login route)
+  pool     - bcrypt verified on the password hasher's thread pool
+
+Run from backend/ (uses a scratch SQLite file unless --database-url is given):
+    python -m benchmarks.load_test_login [--logins 40] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--poll-interval-ms", type=float, default=10)
+    parser.add_argument("--database-url", default="sqlite:///bench_auth.sqlite3")
+    return parser.parse_args()
+
+ARGS = parse_args()
+# app.database builds its engine from DATABASE_URL at import time
+os.environ["DATABASE_URL"] = ARGS.database_url
+
+import httpx  # noqa: E402
+from app.main import app  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.crud import user as crud_user  # noqa: E402
+from app.schemas.user import UserCreate  # noqa: E402
+from app.utils.passwords import password_hasher  # noqa: E402
+
+# One INFO line per request would swamp the report
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "correct horse battery staple"
+
+def ensure_user():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not crud_user.get_user_by_email(db, EMAIL):
+            crud_user.create_user(db, UserCreate(email=EMAIL, password=PASSWORD))
+    finally:
+        db.close()
+
+async def poll(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    # Latency is measured from when each poll was due, not when it was sent,
+    # so time the event loop spends blocked counts against every poll it delays
+    interval = ARGS.poll_interval_ms / 1000
+    latencies = []
+    due = time.perf_counter()
+    while not stop.is_set():
+        response = await client.get("/")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - due) * 1000)
+        due += interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+    return latencies
+
+async def login_burst(client: httpx.AsyncClient, count: int) -> float:
+    limit = asyncio.Semaphore(ARGS.concurrency)
+
+    async def login():
+        async with limit:
+            response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(count)))
+    return time.perf_counter() - start
+
+async def phase(client: httpx.AsyncClient, logins: int) -> tuple[list[float], float]:
+    stop = asyncio.Event()
+    poller = asyncio.create_task(poll(client, stop))
+    if logins:
+        elapsed = await login_burst(client, logins)
+    else:
+        await asyncio.sleep(2)
+        elapsed = 0.0
+    stop.set()
+    return await poller, elapsed
+
+def report(label: str, latencies: list[float], elapsed: float):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    logins = f"{ARGS.logins / elapsed:6.1f} logins/s" if elapsed else ""
+    print(f"{label:<7} polls {len(latencies):5}  p50 {p50:8.1f} ms  p99 {p99:8.1f} ms  max {latencies[-1]:8.1f} ms  {logins}")
+
+async def main():
+    ensure_user()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        report("idle", *await phase(client, 0))
+
+        pooled_verify = password_hasher.verify
+
+        async def inline_verify(plain_password, hashed_password):
+            return crud_user.verify_password(plain_password, hashed_password)
+
+        password_hasher.verify = inline_verify
+        try:
+            report("inline", *await phase(client, ARGS.logins))
+        finally:
+            password_hasher.verify = pooled_verify
+        report("pool", *await phase(client, ARGS.logins))
+
+if __name__ == "__main__":
+    asyncio.run(main())
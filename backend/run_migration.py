@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
-Simple script to add the eli5_summary column to the summaries table.
-Run this if alembic is not working properly.
+Simple script to add columns and indexes introduced after the initial schema
+(e.g. summaries.eli5_summary, documents.file_hash, listing indexes).
+Run this if alembic is not working properly. Every step is idempotent.
 """
 
 import os
@@ -9,32 +10,56 @@ import sys
 from sqlalchemy import create_engine, text
 from app.core.config import settings
 
+# (table, column, column DDL)
+COLUMNS = [
+    ("summaries", "eli5_summary", "TEXT"),
+    ("documents", "file_hash", "VARCHAR(64)"),
+    ("users", "token_version", "INTEGER NOT NULL DEFAULT 0"),
+    ("documents", "recommendations", "JSON"),
+]
+
+# (index name, table, column list)
+INDEXES = [
+    ("ix_documents_file_hash", "documents", "file_hash"),
+    ("ix_documents_owner_created", "documents", "owner_id, created_at, id"),
+    ("ix_citations_document_id", "citations", "document_id"),
+]
+
+def add_column(conn, table, column, ddl):
+    # Check if column already exists
+    result = conn.execute(text("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_name = :table AND column_name = :column
+    """), {"table": table, "column": column})
+
+    if result.fetchone():
+        print(f"Column '{column}' already exists in {table} table.")
+        return
+
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    print(f"Successfully added '{column}' column to {table} table.")
+
+def add_index(conn, name, table, columns):
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+    print(f"Index '{name}' is present on {table}.")
+
 def run_migration():
-    """Add eli5_summary column to summaries table"""
+    """Add missing columns and indexes"""
     try:
         # Create database engine
         engine = create_engine(settings.DATABASE_URL)
-        
+
         with engine.connect() as conn:
-            # Check if column already exists
-            result = conn.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'summaries' AND column_name = 'eli5_summary'
-            """))
-            
-            if result.fetchone():
-                print("Column 'eli5_summary' already exists in summaries table.")
-                return
-            
-            # Add the column
-            conn.execute(text("ALTER TABLE summaries ADD COLUMN eli5_summary TEXT"))
+            for table, column, ddl in COLUMNS:
+                add_column(conn, table, column, ddl)
+            for name, table, columns in INDEXES:
+                add_index(conn, name, table, columns)
             conn.commit()
-            print("Successfully added 'eli5_summary' column to summaries table.")
-            
+
     except Exception as e:
         print(f"Error running migration: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    run_migration() 
\ No newline at end of file
+    run_migration()
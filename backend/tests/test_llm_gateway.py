@@ -0,0 +1,138 @@
+"""
+LLM gateway retries and limits against the local fake endpoint
+(benchmarks/fake_llm.py), reached through LLM_BASE_URL like a real provider.
+
+Run from backend/:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+from app.core.config import settings
+from app.utils.llm_gateway import LLMGateway, LLMGatewayError, process_rate_limits
+from benchmarks.fake_llm import FakeLLM
+
+MESSAGES = [{"role": "user", "content": "Summarize this paper."}]
+
+class LLMGatewayTest(unittest.TestCase):
+    def start_fake(self, **kwargs) -> FakeLLM:
+        fake = FakeLLM(**kwargs).start()
+        self.addCleanup(fake.stop)
+        return fake
+
+    def make_gateway(self, fake: FakeLLM, **overrides) -> LLMGateway:
+        # Settings are read when the gateway starts and on every retry, so they
+        # stay patched for the whole test
+        values = {
+            "LLM_BASE_URL": fake.url,
+            "GROQ_API_KEY": "test-key",
+            "LLM_CACHE_ENABLED": False,
+            "LLM_MAX_RETRIES": 3,
+            "LLM_BACKOFF_BASE": 0.05,
+            "LLM_BACKOFF_MAX": 0.2,
+            "LLM_REQUESTS_PER_MINUTE": 10 ** 6,
+            "LLM_TOKENS_PER_MINUTE": 10 ** 9,
+            **overrides,
+        }
+        patcher = mock.patch.multiple(settings, **values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return LLMGateway()
+
+    def test_429_waits_for_retry_after(self):
+        fake = self.start_fake(latency_ms=0, errors=[429], retry_after=0.5)
+        gateway = self.make_gateway(fake)
+        content = gateway.chat(MESSAGES)
+        self.assertTrue(content)
+        self.assertEqual(fake.statuses, [429, 200])
+        # Retry-After plus at most LLM_BACKOFF_BASE of jitter
+        gap = fake.request_times[1] - fake.request_times[0]
+        self.assertGreaterEqual(gap, 0.5)
+        self.assertLess(gap, 0.5 + 0.05 + 0.5)
+
+    def test_5xx_is_retried_with_backoff(self):
+        fake = self.start_fake(latency_ms=0, errors=[503, 500])
+        gateway = self.make_gateway(fake)
+        content = gateway.chat(MESSAGES, response_format={"type": "json_object"})
+        self.assertIn("introduction", content)
+        self.assertEqual(fake.statuses, [503, 500, 200])
+        # Jittered exponential backoff stays under LLM_BACKOFF_MAX per retry
+        for earlier, later in zip(fake.request_times, fake.request_times[1:]):
+            self.assertLess(later - earlier, 0.2 + 0.5)
+
+    def test_retries_exhausted_raises(self):
+        fake = self.start_fake(latency_ms=0, errors=[500] * 10)
+        gateway = self.make_gateway(fake, LLM_MAX_RETRIES=2)
+        with self.assertRaises(LLMGatewayError) as raised:
+            gateway.chat(MESSAGES)
+        self.assertIn("after 3 attempts", str(raised.exception))
+        self.assertEqual(fake.requests, 3)
+
+    def test_client_error_is_not_retried(self):
+        fake = self.start_fake(latency_ms=0, errors=[400])
+        gateway = self.make_gateway(fake)
+        with self.assertRaises(LLMGatewayError):
+            gateway.chat(MESSAGES)
+        self.assertEqual(fake.requests, 1)
+
+    def test_concurrency_cap(self):
+        fake = self.start_fake(latency_ms=200)
+        gateway = self.make_gateway(fake, LLM_MAX_CONCURRENCY=2)
+
+        async def fan_out():
+            return await asyncio.gather(*(gateway.achat(MESSAGES) for _ in range(6)))
+
+        start = time.monotonic()
+        results = asyncio.run(fan_out())
+        elapsed = time.monotonic() - start
+        self.assertEqual(len(results), 6)
+        self.assertEqual(fake.requests, 6)
+        self.assertEqual(fake.max_in_flight, 2)
+        # Three waves of two
+        self.assertGreaterEqual(elapsed, 0.6)
+
+    def test_stream(self):
+        fake = self.start_fake(latency_ms=0, errors=[429], retry_after=0.1)
+        gateway = self.make_gateway(fake)
+
+        async def collect():
+            return [piece async for piece in gateway.astream(MESSAGES)]
+
+        pieces = asyncio.run(collect())
+        self.assertGreater(len(pieces), 1)
+        self.assertTrue("".join(pieces).startswith("Fake completion"))
+        self.assertEqual(fake.statuses, [429, 200])
+
+class ProcessRateLimitsTest(unittest.TestCase):
+    def limits(self, **overrides):
+        values = {
+            "LLM_REQUESTS_PER_MINUTE": 100,
+            "LLM_TOKENS_PER_MINUTE": 100000,
+            "LLM_API_PROCESSES": 2,
+            "LLM_WORKER_PROCESSES": 0,
+            "LLM_API_RATE_SHARE": 0.2,
+            "CELERY_WORKER_CONCURRENCY": 4,
+            "CELERY_TASK_ALWAYS_EAGER": False,
+            **overrides,
+        }
+        with mock.patch.multiple(settings, **values):
+            return process_rate_limits()
+
+    def test_budget_is_split_across_processes(self):
+        api = self.limits(DB_ROLE="api")
+        worker = self.limits(DB_ROLE="worker")
+        self.assertEqual(api, (10, 10000))
+        self.assertEqual(worker, (20, 20000))
+        # Two API processes and four worker children stay within the account limit
+        self.assertAlmostEqual(2 * api[0] + 4 * worker[0], 100)
+
+    def test_worker_processes_override_concurrency(self):
+        self.assertEqual(self.limits(DB_ROLE="worker", LLM_WORKER_PROCESSES=8), (10, 10000))
+
+    def test_eager_api_gets_whole_budget(self):
+        self.assertEqual(self.limits(DB_ROLE="api", CELERY_TASK_ALWAYS_EAGER=True), (50, 50000))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,6 +16,80 @@ interface UploadedFile {
     error?: string
 }
 
+interface DocumentState {
+    id: number
+    status: "PENDING" | "PROCESSING" | "COMPLETED" | "FAILED"
+    progress: number
+}
+
+const API_URL = "https://research-cite.onrender.com"
+const TERMINAL_STATUSES = ["COMPLETED", "FAILED"]
+const POLL_INTERVAL_MS = 2000
+
+function fileState(document: DocumentState): Pick<UploadedFile, "status" | "progress"> {
+    const status = {
+        PENDING: "processing",
+        PROCESSING: "processing",
+        COMPLETED: "completed",
+        FAILED: "error",
+    }[document.status] as UploadedFile["status"]
+    return { status, progress: document.progress }
+}
+
+// Follows /documents/{id}/events (Server-Sent Events, read through fetch so the
+// bearer token can be sent) until the document is COMPLETED or FAILED. If the
+// stream drops before that, falls back to polling GET /documents/{id}.
+async function waitForDocument(
+    document: DocumentState,
+    token: string | null,
+    onProgress: (update: DocumentState) => void,
+): Promise<DocumentState> {
+    if (TERMINAL_STATUSES.includes(document.status)) return document
+    const headers = { "Authorization": `Bearer ${token}` }
+
+    try {
+        const resp = await fetch(`${API_URL}/documents/${document.id}/events`, { headers })
+        if (resp.ok && resp.body) {
+            const reader = resp.body.pipeThrough(new TextDecoderStream()).getReader()
+            let buffer = ""
+            stream: while (true) {
+                const { value, done } = await reader.read()
+                if (done) break
+                buffer += value
+                const events = buffer.split("\n\n")
+                buffer = events.pop() ?? ""
+                for (const event of events) {
+                    const data = event.split("\n").find((line) => line.startsWith("data: "))
+                    if (!data) continue  // heartbeat comment
+                    if (!event.startsWith("event: progress")) {
+                        // e.g. "gone": the document was deleted; polling reports the 404
+                        await reader.cancel()
+                        break stream
+                    }
+                    const update = JSON.parse(data.slice(6))
+                    const state = { id: document.id, status: update.status, progress: update.progress }
+                    if (TERMINAL_STATUSES.includes(state.status)) {
+                        await reader.cancel()
+                        return state
+                    }
+                    onProgress(state)
+                }
+            }
+        }
+    } catch (err) {
+        console.warn("Progress stream interrupted, polling instead", err)
+    }
+
+    while (true) {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+        const resp = await fetch(`${API_URL}/documents/${document.id}`, { headers })
+        if (!resp.ok) throw new Error(resp.statusText)
+        const state: DocumentState = await resp.json()
+        if (TERMINAL_STATUSES.includes(state.status)) return state
+        onProgress(state)
+    }
+}
+
 interface FileUploadSectionProps {
   onUploadComplete: (docId: number) => void;
 }
@@ -34,14 +108,19 @@ export function FileUploadSection({ onUploadComplete }: FileUploadSectionProps)
         setIsDragOver(false)
     }, [])
 
+    const updateFile = useCallback((id: string, changes: Partial<UploadedFile>) => {
+        setFiles((prev) => prev.map((f) => (f.id === id ? { ...f, ...changes } : f)))
+    }, [])
+
     const uploadFileToServer = useCallback(async (file: File, tempId: string) => {
         const formData = new FormData()
         formData.append("file", file)
     
         const token = localStorage.getItem("access_token")
+        let fileId = tempId
     
         try {
-            const resp = await fetch("https://research-cite.onrender.com/documents", {
+            const resp = await fetch(`${API_URL}/documents`, {
                 method: "POST",
                 body: formData,
                 headers: {
@@ -49,32 +128,29 @@ export function FileUploadSection({ onUploadComplete }: FileUploadSectionProps)
                 },
             })
             if (!resp.ok) throw new Error(resp.statusText)
-            const document = await resp.json()
-            onUploadComplete(document.id)
+            // 202: the document is queued; processing happens in the background
+            const document: DocumentState = await resp.json()
+            fileId = document.id.toString()
             setFiles((prev) =>
-                prev.map((f) =>
-                    f.id === tempId
-                        ? {
-                            ...f,
-                            id: document.id.toString(),
-                            status: document.status.toLowerCase() as UploadedFile["status"],
-                            progress: document.progress,
-                        }
-                        : f
-                )
+                prev.map((f) => (f.id === tempId ? { ...f, id: fileId, ...fileState(document) } : f))
             )
+
+            const final = await waitForDocument(document, token, (update) => updateFile(fileId, fileState(update)))
+            updateFile(fileId, fileState(final))
+            if (final.status === "FAILED") throw new Error("Processing failed")
+            onUploadComplete(document.id)
         } catch (err: unknown) {
             const errorMessage = err instanceof Error ? err.message : "Unknown error"
             console.error(err)
             setFiles((prev) =>
                 prev.map((f) =>
-                    f.id === tempId
+                    f.id === fileId
                         ? { ...f, status: "error", progress: 0, error: errorMessage }
                         : f
                 )
             )
         }
-    }, [onUploadComplete])
+    }, [onUploadComplete, updateFile])
     
 
     const handleFiles = useCallback((fileList: File[]) => {
@@ -12,6 +12,8 @@ import { ScrollArea } from "@/components/ui/scroll-area"
 import { Search, FileText, Calendar, MoreVertical, Trash2, Download, Eye } from "lucide-react"
 import { DropdownMenu, DropdownMenuContent, DropdownMenuItem, DropdownMenuTrigger } from "@/components/ui/dropdown-menu"
 
+const PAGE_SIZE = 20
+
 export function PreviousSummariesSection() {
   const router = useRouter()
   const [searchTerm, setSearchTerm] = useState("")
@@ -19,65 +21,55 @@ export function PreviousSummariesSection() {
   const [loading, setLoading] = useState(false)
   const [deletingIds, setDeletingIds] = useState<Set<number>>(new Set())
 
-  useEffect(() => {
-    const fetchDocuments = async () => {
-      try {
-        setLoading(true)
-        const token = localStorage.getItem("access_token") // assuming you store JWT in localStorage
-        const response = await fetch("https://research-cite.onrender.com/documents/", {
-          method: "GET",
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-        })
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+
+  // One page of the dashboard listing; the cursor for the page after it comes
+  // back in the X-Next-Cursor header (absent on the last page)
+  const fetchDocuments = async (cursor?: string) => {
+    const token = localStorage.getItem("access_token") // assuming you store JWT in localStorage
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+    if (cursor) params.set("cursor", cursor)
+    const response = await fetch(`https://research-cite.onrender.com/documents/dashboard?${params}`, {
+      method: "GET",
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    })
+    if (!response.ok) throw new Error(response.statusText)
 
-        const docs = await response.json()
+    const docs = await response.json()
 
-        // Map documents to summary card format
-        const formattedSummaries = await Promise.all(
-          docs.map(async (doc: any) => {
-            let summaryText = ""
-            if (doc.status === "COMPLETED") {
-              try {
-                const summaryResponse = await fetch(`https://research-cite.onrender.com/documents/${doc.id}/summary`, {
-                  method: "GET",
-                  headers: { Authorization: `Bearer ${token}` },
-                })
-                if (summaryResponse.ok) {
-                  const summaryData = await summaryResponse.json()
-                  // Construct summary text from the available fields
-                  const summaryParts = [
-                    summaryData.introduction,
-                    summaryData.methods,
-                    summaryData.results,
-                    summaryData.conclusion
-                  ].filter(part => part && part.trim() !== "")
-                  
-                  summaryText = summaryParts.length > 0 
-                    ? summaryParts.join(" ") 
-                    : "Summary not available."
-                } else {
-                  summaryText = "Summary not available."
-                }
-              } catch (e) {
-                summaryText = "Summary not available."
-              }
-            } else {
-              summaryText = "Processing..."
-            }
+    // Map documents to summary card format; the dashboard endpoint already
+    // includes a snippet of each summary
+    const formattedSummaries = docs.map((doc: any) => {
+      let summaryText = ""
+      if (doc.status === "COMPLETED") {
+        summaryText = doc.summary_snippet || "Summary not available."
+      } else {
+        summaryText = "Processing..."
+      }
+
+      return {
+        id: doc.id,
+        title: doc.original_filename || doc.source_url || "Untitled Document",
+        authors: [], // extend your API later to include authors if needed
+        date: doc.created_at,
+        tags: [], // extend your API later to include tags if needed
+        summary: summaryText,
+      }
+    })
 
-            return {
-              id: doc.id,
-              title: doc.original_filename || doc.source_url || "Untitled Document",
-              authors: [], // extend your API later to include authors if needed
-              date: doc.created_at,
-              tags: [], // extend your API later to include tags if needed
-              summary: summaryText,
-            }
-          })
-        )
+    return { summaries: formattedSummaries, nextCursor: response.headers.get("X-Next-Cursor") }
+  }
 
-        setSummaries(formattedSummaries)
+  useEffect(() => {
+    const fetchFirstPage = async () => {
+      try {
+        setLoading(true)
+        const page = await fetchDocuments()
+        setSummaries(page.summaries)
+        setNextCursor(page.nextCursor)
       } catch (error) {
         console.error("Error fetching documents:", error)
       } finally {
@@ -85,9 +77,23 @@ export function PreviousSummariesSection() {
       }
     }
 
-    fetchDocuments()
+    fetchFirstPage()
   }, [])
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return
+    try {
+      setLoadingMore(true)
+      const page = await fetchDocuments(nextCursor)
+      setSummaries((prevSummaries) => [...prevSummaries, ...page.summaries])
+      setNextCursor(page.nextCursor)
+    } catch (error) {
+      console.error("Error fetching documents:", error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDelete = async (docId: number) => {
     // Add confirmation dialog
     const isConfirmed = window.confirm("Are you sure you want to delete this document? This action cannot be undone.")
@@ -254,6 +260,11 @@ export function PreviousSummariesSection() {
                 </Card>
               ))
             )}
+            {!loading && nextCursor && (
+              <Button variant="outline" className="w-full" onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore ? "Loading..." : "Load more"}
+              </Button>
+            )}
           </div>
         </ScrollArea>
 